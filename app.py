@@ -1,41 +1,45 @@
-from flask import Flask, jsonify
-from flask.json.provider import DefaultJSONProvider
+import hmac
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
-from datetime import datetime, date
-from config import database_url
+from config import database_url, archive_scheduler_enabled, import_worker_threads, json_provider, metrics_token
+from json_provider import get_json_provider_class
+from metrics import init_request_metrics, render_metrics
 
 from routes.users import users_bp
 from routes.categories import categories_bp
 from routes.tasks import tasks_bp
 from routes.comments import comments_bp
-
-
-class CustomJSONProvider(DefaultJSONProvider):
-    def default(self, obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        if isinstance(obj, date):
-            return obj.isoformat()
-        return super().default(obj)
+from routes.events import events_bp
+from services.archive_service import start_archive_scheduler
+from services.import_job_service import start_import_poller
 
 
 def create_app():
     app = Flask(__name__)
-    app.json_provider_class = CustomJSONProvider
-    app.json = CustomJSONProvider(app)
+    app.json_provider_class = get_json_provider_class(json_provider)
+    app.json = app.json_provider_class(app)
 
     CORS(app, resources={r"/*": {"origins": "*"}})
+    init_request_metrics(app)
 
     # Register blueprints
     app.register_blueprint(users_bp, url_prefix="/users")
     app.register_blueprint(categories_bp, url_prefix="/categories")
     app.register_blueprint(tasks_bp, url_prefix="/tasks")
     app.register_blueprint(comments_bp, url_prefix="/tasks")
+    app.register_blueprint(events_bp, url_prefix="/events")
 
     @app.route("/health")
     def health():
         return jsonify({"status": "healthy"})
 
+    @app.route("/metrics")
+    def metrics():
+        # Counters of this process only (see WEB_CONCURRENCY in gunicorn.conf.py)
+        if metrics_token and not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {metrics_token}"):
+            return Response("Unauthorized\n", status=401, mimetype="text/plain")
+        return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
     @app.route("/")
     def root():
         return jsonify({"service": "impag-tasks", "status": "running"})
@@ -43,8 +47,22 @@ def create_app():
     return app
 
 
+def start_background_tasks():
+    """
+    Start per-process background threads. Called once per serving process (gunicorn's
+    post_worker_init, or __main__ below), never at import: threads do not survive a fork.
+    """
+    # Auto-archive done tasks in the background instead of on GET /tasks
+    if archive_scheduler_enabled:
+        start_archive_scheduler()
+    # Resume import jobs left queued or stale by a previous process
+    if import_worker_threads > 0:
+        start_import_poller()
+
+
 app = create_app()
 
 if __name__ == "__main__":
     print(f"DB connected: {'Yes' if database_url else 'No'}")
+    start_background_tasks()
     app.run(host="0.0.0.0", port=8001, debug=True)
@@ -1,36 +1,184 @@
+import base64
+import hashlib
+import hmac
+import json
+import os
+import re
+import threading
+import time
 from functools import wraps
 from flask import request, jsonify
-from google.oauth2 import id_token
-from google.auth.transport import requests as google_requests
-from config import google_client_id, allowed_emails
+from cache import TTLCache
+from config import google_client_id, allowed_emails, token_cache_size, events_ticket_ttl, events_ticket_secret
+from models import resolve_task_user
 
+GOOGLE_CERTS_URL = "https://www.googleapis.com/oauth2/v1/certs"
+GOOGLE_ISSUERS = ("accounts.google.com", "https://accounts.google.com")
 
-def require_auth(f):
-    """Decorator that verifies Google OAuth token and checks email whitelist."""
-    @wraps(f)
-    def decorated(*args, **kwargs):
-        auth_header = request.headers.get("Authorization")
-        if not auth_header or not auth_header.startswith("Bearer "):
-            return jsonify({"detail": "Missing or invalid authorization header"}), 401
+# Used when Google's cert response carries no usable Cache-Control header
+DEFAULT_CERTS_MAX_AGE = 300
 
-        token = auth_header.split("Bearer ")[1]
+MAX_AGE_PATTERN = re.compile(r"max-age=(\d+)")
+
+
+class TokenVerifier:
+    """
+    Verifies Google ID tokens, caching both the signing certs (for as long as
+    Google's Cache-Control allows) and the decoded claims of each token (until
+    the token's own exp). A repeat call with the same token does no crypto and
+    no network I/O.
+    """
+
+    def __init__(self, client_id, certs_url=GOOGLE_CERTS_URL, max_entries=1024,
+                 transport=None, clock=time.time):
+        self.client_id = client_id
+        self.certs_url = certs_url
+        self.clock = clock
+        self.claims = TTLCache(max_entries=max_entries, clock=clock)
+        self.cert_fetches = 0
+        self._transport = transport
+        self._certs = None
+        self._certs_expire_at = 0
+        self._certs_lock = threading.Lock()
+
+    def _get_transport(self):
+        if self._transport is None:
+            from google.auth.transport import requests as google_requests
+
+            self._transport = google_requests.Request()
+        return self._transport
+
+    def _get_certs(self):
+        with self._certs_lock:
+            if self._certs is not None and self._certs_expire_at > self.clock():
+                return self._certs
+
+            response = self._get_transport()(self.certs_url, method="GET")
+            if response.status != 200:
+                raise ValueError(f"Could not fetch certificates at {self.certs_url}")
+
+            self._certs = json.loads(response.data)
+            self._certs_expire_at = self.clock() + _cache_lifetime(response.headers)
+            self.cert_fetches += 1
+            return self._certs
+
+    def verify(self, token):
+        """Return the token's claims, raising ValueError if it is invalid or expired."""
+        key = hashlib.sha256(token.encode()).hexdigest()
+        idinfo = self.claims.get(key)
+        if idinfo is not None:
+            return idinfo
+
+        from google.auth import jwt
+
+        idinfo = jwt.decode(token, certs=self._get_certs(), audience=self.client_id)
+        if idinfo.get("iss") not in GOOGLE_ISSUERS:
+            raise ValueError(f"Wrong issuer: {idinfo.get('iss')}")
+
+        self.claims.set(key, idinfo, idinfo["exp"])
+        return idinfo
+
+    def stats(self):
+        return {**self.claims.stats(), "cert_fetches": self.cert_fetches}
+
+
+def _cache_lifetime(headers):
+    """Seconds the cert response may be reused, per Cache-Control max-age minus Age."""
+    match = MAX_AGE_PATTERN.search(headers.get("cache-control", "") or "")
+    if not match:
+        return DEFAULT_CERTS_MAX_AGE
+    try:
+        age = int(headers.get("age", 0) or 0)
+    except ValueError:
+        age = 0
+    return max(int(match.group(1)) - age, 0)
 
+
+token_verifier = TokenVerifier(google_client_id, max_entries=token_cache_size)
+
+
+# Signs stream tickets. The random fallback is made in gunicorn's master
+# (preload_app), so every worker of an instance accepts the same tickets.
+_ticket_key = events_ticket_secret.encode() if events_ticket_secret else os.urandom(32)
+
+
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def issue_stream_ticket(user_info, ttl=events_ticket_ttl):
+    """
+    A signed, short-lived ticket carrying `user_info`, for opening /events: unlike
+    the Google ID token, it is fine in a URL that proxies may log.
+    """
+    payload = _b64(json.dumps({**user_info, "exp": int(time.time()) + ttl}).encode())
+    signature = _b64(hmac.new(_ticket_key, payload.encode(), hashlib.sha256).digest())
+    return f"{payload}.{signature}"
+
+
+def verify_stream_ticket(ticket):
+    """Return the user_info in a ticket from issue_stream_ticket, raising ValueError if invalid or expired."""
+    payload, _, signature = ticket.partition(".")
+    expected = _b64(hmac.new(_ticket_key, payload.encode(), hashlib.sha256).digest())
+    if not hmac.compare_digest(signature, expected):
+        raise ValueError("Bad ticket signature")
+    try:
+        user_info = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (ValueError, TypeError) as exc:
+        raise ValueError("Malformed ticket") from exc
+    if user_info.pop("exp", 0) <= time.time():
+        raise ValueError("Expired ticket")
+    return user_info
+
+
+def authenticate_request(allow_stream_ticket=False):
+    """
+    Verify the request's Google token and email whitelist, setting request.user_info.
+    Returns None on success, or an error response tuple.
+    allow_stream_ticket also accepts ?ticket= from POST /events/ticket (EventSource
+    cannot send headers, and ID tokens must not go in URLs).
+    """
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        token = auth_header.split("Bearer ")[1]
+    elif allow_stream_ticket and request.args.get("ticket"):
         try:
-            idinfo = id_token.verify_oauth2_token(
-                token, google_requests.Request(), google_client_id
-            )
-        except Exception:
-            return jsonify({"detail": "Invalid or expired token"}), 401
-
-        email = idinfo.get("email", "").lower()
-        if email not in allowed_emails:
+            user_info = verify_stream_ticket(request.args["ticket"])
+        except ValueError:
+            return jsonify({"detail": "Invalid or expired ticket"}), 401
+        if user_info.get("email") not in allowed_emails:
             return jsonify({"detail": "Email not authorized"}), 403
+        request.user_info = user_info
+        return None
+    else:
+        return jsonify({"detail": "Missing or invalid authorization header"}), 401
+
+    try:
+        idinfo = token_verifier.verify(token)
+    except Exception:
+        return jsonify({"detail": "Invalid or expired token"}), 401
+
+    email = idinfo.get("email", "").lower()
+    if email not in allowed_emails:
+        return jsonify({"detail": "Email not authorized"}), 403
+
+    task_user = resolve_task_user(email)
+    request.user_info = {
+        "email": email,
+        "name": idinfo.get("name", ""),
+        "picture": idinfo.get("picture", ""),
+        "user_id": idinfo.get("sub", ""),
+        "task_user_id": task_user.id if task_user else None,
+    }
+    return None
 
-        request.user_info = {
-            "email": email,
-            "name": idinfo.get("name", ""),
-            "picture": idinfo.get("picture", ""),
-            "user_id": idinfo.get("sub", ""),
-        }
+
+def require_auth(f):
+    """Decorator that verifies Google OAuth token and checks email whitelist."""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        error = authenticate_request()
+        if error:
+            return error
         return f(*args, **kwargs)
     return decorated
@@ -0,0 +1,96 @@
+"""
+Before/after benchmark for comment_count on task lists.
+
+Seeds tasks with many comments each inside a transaction that is rolled back
+at the end, then times the old list query (joinedload of every comment,
+len() in Python) against the aggregate column_property.
+
+    DATABASE_URL=postgresql://localhost/impag_bench python -m benchmarks.comment_count
+"""
+import argparse
+import statistics
+import time
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload
+from models import SessionLocal, Task, TaskUser, TaskCategory, TaskComment
+
+
+def seed(db, tasks, comments_per_task):
+    user_id = db.execute(
+        insert(TaskUser).values(email="bench-comments@example.com", display_name="Bench").returning(TaskUser.id)
+    ).scalar_one()
+    category_id = db.execute(
+        insert(TaskCategory).values(name="Bench", created_by=user_id).returning(TaskCategory.id)
+    ).scalar_one()
+    task_ids = db.execute(
+        insert(Task).returning(Task.id),
+        [
+            {"title": f"Tarea de prueba {i}", "created_by": user_id, "assigned_to": user_id,
+             "category_id": category_id, "status": "pending"}
+            for i in range(tasks)
+        ],
+    ).scalars().all()
+    db.execute(
+        insert(TaskComment),
+        [
+            {"task_id": task_id, "user_id": user_id, "content": "Comentario de seguimiento " * 8}
+            for task_id in task_ids
+            for _ in range(comments_per_task)
+        ],
+    )
+    db.flush()
+
+
+def list_with_joined_comments(db, limit):
+    tasks = db.query(Task).options(
+        joinedload(Task.creator),
+        joinedload(Task.assignee),
+        joinedload(Task.category),
+        joinedload(Task.comments),
+    ).filter(Task.status != "archived").order_by(Task.created_at.desc()).limit(limit).all()
+    return [len(t.comments) for t in tasks]
+
+
+def list_with_aggregate(db, limit):
+    tasks = db.query(Task).options(
+        joinedload(Task.creator),
+        joinedload(Task.assignee),
+        joinedload(Task.category),
+    ).filter(Task.status != "archived").order_by(Task.created_at.desc()).limit(limit).all()
+    return [t.comment_count for t in tasks]
+
+
+def measure(db, fn, limit, runs):
+    timings = []
+    for _ in range(runs):
+        db.expunge_all()
+        start = time.perf_counter()
+        fn(db, limit)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), max(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=500)
+    parser.add_argument("--comments", type=int, default=40, help="comments per task")
+    parser.add_argument("--limit", type=int, default=50, help="page size of the list query")
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        seed(db, args.tasks, args.comments)
+        assert set(list_with_aggregate(db, args.limit)) == {args.comments}
+
+        for label, fn in (("before (joinedload comments)", list_with_joined_comments),
+                          ("after (aggregate subquery)", list_with_aggregate)):
+            median, worst = measure(db, fn, args.limit, args.runs)
+            print(f"{label:32} median {median:8.2f} ms   max {worst:8.2f} ms")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
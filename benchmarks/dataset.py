@@ -0,0 +1,240 @@
+"""
+Synthetic dataset generator for load tests.
+
+Seeds users, the eight categories from 001_initial_schema.sql, tasks shaped like
+002_seed_real_tasks.sql (Spanish titles about quotes, shipments, installations,
+payments and invoices) and their comments, streaming rows in with COPY.
+
+Only the board (--active tasks, pending/in_progress/done) holds task numbers,
+as in production; everything else is archived over the past two years.
+
+    DATABASE_URL=postgresql://localhost/impag_bench python -m benchmarks.dataset --tasks 100000 --reset
+
+Refuses to touch a non-local database unless --allow-remote is given.
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urlparse
+from sqlalchemy import text
+from config import database_url
+from models import get_engine
+
+LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1", None, ""}
+
+BENCH_EMAIL = "bench{}@example.com"
+
+CATEGORIES = (
+    ("General", "#64748b", "clipboard-list"),
+    ("Envíos en tránsito", "#f59e0b", "truck"),
+    ("Por enviar", "#6366f1", "package"),
+    ("Compras por realizar", "#22c55e", "shopping-cart"),
+    ("Instalaciones", "#8b5cf6", "wrench"),
+    ("Rastreo de guías", "#ec4899", "map-pin"),
+    ("Solicitud de facturas", "#14b8a6", "receipt"),
+    ("Seguimiento a cotizaciones", "#f97316", "file-text"),
+)
+
+PEOPLE = (
+    "Juan Herrera", "Miguel Herrera", "Sora Gurrola", "María García", "Marcos Limón",
+    "Ángeles Hernández", "Sergio García", "Jesús Salazar", "Fernanda Molina", "Anayeli Rosas",
+    "Genaro Bueno", "Julio Márquez", "Idelfonso", "Osvaldo", "Ing. Genesis", "Adriana",
+)
+PLACES = (
+    "Tepehuanes", "Tuxpan", "Mezquital", "Dgo capital", "Nuevo Ideal", "Tamazula",
+    "Toluca", "Alamillos Hidalgo", "Villa Hermosa Dgo", "Poanas", "Canatlán", "Santiago Papasquiaro",
+)
+PRODUCTS = (
+    "geomembrana", "malla sombra al 50%", "malla electro soldada", "plástico de invernadero",
+    "charolas 77 cavidades", "bomba de superficie", "lámparas solares 240W", "ground cover",
+    "línea de regado", "picadora de forraje", "semilla de maíz", "bolsa 15x25", "geotextil",
+)
+SUPPLIERS = ("Geoliners", "Popusa", "Cofiasa", "Mundo Lúcido", "Xcel Wobler")
+
+# (category index, weight, title templates)
+TITLE_TEMPLATES = (
+    (7, 5, ("Cotización {product} {person} - {place}", "{person} - Cotización {product}",
+            "Actualizar cotización {product} - cliente la vio cara")),
+    (1, 3, ("Entrega de material {person} {place}", "Seguimiento envío cot {code} - {n} paquetes a {place}")),
+    (2, 3, ("Entregar {product} - {person} ({place})", "Enviar {n} paquetes {product} a {place}")),
+    (3, 2, ("Comprar {product} con {supplier}", "Recibir {product} de {supplier}")),
+    (4, 2, ("Instalación de {product} {person}", "{person} ({place}) - estanque {product}")),
+    (5, 2, ("Rastreo {n} mallas {supplier} - guía {code}", "Monitoreo {product} {supplier} - guía {code}")),
+    (6, 2, ("Factura y guía {person} - {product} ${amount}", "Solicitar factura de {supplier}")),
+    (0, 2, ("Pago pendiente {person} - {n} mallas ${amount}", "Pago de taxi envío {n} paquetes a {place}")),
+)
+DESCRIPTIONS = (
+    "Pedir {product} a {supplier}, falta factura y envío.",
+    "Preguntar si bajan o lo envío.",
+    "Pagará el sábado/lunes. Ya se pidió a {supplier}.",
+    "Con elevador manguera externa.",
+    "Las tiene el Ing. David en {place}.",
+    "Cliente espera respuesta por WhatsApp.",
+)
+COMMENTS = (
+    "Ya contacté a {supplier}, dicen que envían factura mañana.",
+    "Perfecto, en cuanto llegue la factura avísame para procesar el pago.",
+    "Falta coordinar transporte a {place}.",
+    "El cliente confirmó por WhatsApp.",
+    "Se mandó la cotización actualizada.",
+    "La guía ya aparece en tránsito.",
+)
+
+STATUSES = ("pending", "in_progress", "done")
+STATUS_WEIGHTS = (6, 2, 2)
+PRIORITIES = ("low", "medium", "high", "urgent")
+PRIORITY_WEIGHTS = (2, 5, 3, 1)
+
+TASK_COLUMNS = (
+    "title", "description", "status", "priority", "due_date", "category_id", "created_by",
+    "assigned_to", "task_number", "completed_at", "archived_at", "created_at", "last_updated",
+)
+COMMENT_COLUMNS = ("task_id", "user_id", "content", "created_at")
+
+COPY_BATCH = 50_000
+
+
+def fill(rng, template):
+    return template.format(
+        person=rng.choice(PEOPLE), place=rng.choice(PLACES), product=rng.choice(PRODUCTS),
+        supplier=rng.choice(SUPPLIERS), n=rng.randint(1, 12), amount=f"{rng.randint(3, 400) * 100:,}",
+        code=f"{rng.choice('ABCDHJKLPU')}{rng.randint(100, 99999)}",
+    )
+
+
+def random_title(rng):
+    """A title and its category index, in the voice of 002_seed_real_tasks.sql."""
+    category, _, templates = rng.choices(TITLE_TEMPLATES, weights=[t[1] for t in TITLE_TEMPLATES])[0]
+    return fill(rng, rng.choice(templates))[:300], category
+
+
+def generate_tasks(rng, count, active, first_number, user_ids, category_ids, now):
+    """Yield task rows (TASK_COLUMNS order): `active` numbered board tasks, the rest archived."""
+    for i in range(count):
+        title, category = random_title(rng)
+        created_at = now - timedelta(minutes=rng.randint(0, 2 * 365 * 24 * 60))
+        on_board = i < active
+        status = rng.choices(STATUSES, weights=STATUS_WEIGHTS)[0] if on_board else "archived"
+        completed_at = archived_at = None
+        if status in ("done", "archived"):
+            completed_at = min(created_at + timedelta(hours=rng.randint(1, 24 * 20)), now)
+        if status == "archived":
+            archived_at = min(completed_at + timedelta(days=3), now)
+        yield (
+            title,
+            fill(rng, rng.choice(DESCRIPTIONS)) if rng.random() < 0.6 else None,
+            status,
+            rng.choices(PRIORITIES, weights=PRIORITY_WEIGHTS)[0],
+            (created_at + timedelta(days=rng.randint(1, 30))).date() if rng.random() < 0.3 else None,
+            category_ids[category],
+            rng.choice(user_ids),
+            rng.choice(user_ids),
+            first_number + i if on_board else None,
+            completed_at,
+            archived_at,
+            created_at,
+            archived_at or completed_at or created_at,
+        )
+
+
+def generate_comments(rng, task_ids, per_task, user_ids, now):
+    for task_id in task_ids:
+        for _ in range(rng.randint(0, per_task * 2)):
+            yield (task_id, rng.choice(user_ids), fill(rng, rng.choice(COMMENTS)),
+                   now - timedelta(minutes=rng.randint(0, 60 * 24 * 90)))
+
+
+def copy_rows(cursor, table, columns, rows):
+    """COPY an iterator of tuples into `table` in batches of COPY_BATCH. Returns the row count."""
+    total = 0
+    sql = f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+    while True:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        batch = 0
+        for row in rows:
+            writer.writerow(["\\N" if v is None else v for v in row])
+            batch += 1
+            if batch == COPY_BATCH:
+                break
+        if not batch:
+            return total
+        buffer.seek(0)
+        cursor.copy_expert(sql, buffer)
+        total += batch
+
+
+def seed(conn, args):
+    rng = random.Random(args.seed)
+    now = datetime.now(timezone.utc)
+
+    if args.reset:
+        conn.execute(text(
+            "TRUNCATE task_comment, task, task_tombstone, import_job, dedup_verdict RESTART IDENTITY"
+        ))
+
+    conn.execute(
+        text(
+            "INSERT INTO task_user (email, display_name, role) VALUES (:email, :name, 'member') "
+            "ON CONFLICT (email) DO NOTHING"
+        ),
+        [{"email": BENCH_EMAIL.format(i), "name": f"Bench {i}"} for i in range(args.users)],
+    )
+    user_ids = conn.execute(text("SELECT id FROM task_user ORDER BY id")).scalars().all()
+
+    existing = dict(conn.execute(text("SELECT name, id FROM task_category WHERE is_active")).all())
+    for sort_order, (name, color, icon) in enumerate(CATEGORIES):
+        if name not in existing:
+            existing[name] = conn.execute(
+                text(
+                    "INSERT INTO task_category (name, color, icon, created_by, sort_order) "
+                    "VALUES (:name, :color, :icon, :created_by, :sort_order) RETURNING id"
+                ),
+                {"name": name, "color": color, "icon": icon, "created_by": user_ids[0], "sort_order": sort_order},
+            ).scalar_one()
+    category_ids = [existing[name] for name, _, _ in CATEGORIES]
+
+    first_number = conn.execute(text("SELECT coalesce(max(task_number), 0) + 1 FROM task")).scalar_one()
+    if first_number + args.active > 32767:
+        raise SystemExit("task_number is a SMALLINT: lower --active or use --reset")
+    first_id = conn.execute(text("SELECT coalesce(max(id), 0) FROM task")).scalar_one()
+
+    cursor = conn.connection.cursor()
+    try:
+        start = time.perf_counter()
+        tasks = copy_rows(cursor, "task", TASK_COLUMNS, generate_tasks(
+            rng, args.tasks, min(args.active, args.tasks), first_number, user_ids, category_ids, now
+        ))
+        task_ids = conn.execute(text("SELECT id FROM task WHERE id > :id ORDER BY id"), {"id": first_id}).scalars().all()
+        comments = copy_rows(cursor, "task_comment", COMMENT_COLUMNS, generate_comments(
+            rng, task_ids, args.comments, user_ids, now
+        ))
+        print(f"Copied {tasks} tasks and {comments} comments in {time.perf_counter() - start:.1f}s")
+    finally:
+        cursor.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=10_000, help="tasks to add (10k to 1M)")
+    parser.add_argument("--active", type=int, default=3_000, help="of which on the board (numbered)")
+    parser.add_argument("--comments", type=int, default=2, help="average comments per task")
+    parser.add_argument("--users", type=int, default=5, help="bench users (bench<i>@example.com)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="truncate tasks, comments and jobs first")
+    parser.add_argument("--allow-remote", action="store_true")
+    args = parser.parse_args()
+
+    if urlparse(database_url).hostname not in LOCAL_HOSTS and not args.allow_remote:
+        raise SystemExit("Refusing to seed a non-local database (pass --allow-remote to override)")
+
+    with get_engine().begin() as conn:
+        seed(conn, args)
+        conn.execute(text("ANALYZE task; ANALYZE task_comment"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+EXPLAIN regression check for the hot task queries.
+
+Builds each query with the same code the routes use (select_tasks +
+apply_task_filters, search, archive, delta sync), runs EXPLAIN on it and fails
+if the plan reads task or task_comment with a sequential scan. Needs a large
+seeded dataset (python -m benchmarks.dataset --tasks 100000 --reset) so the
+planner's choices match production at scale.
+
+    DATABASE_URL=postgresql://localhost/impag_bench python -m benchmarks.explain_check
+
+tests/test_query_plans.py runs the same check on a freshly seeded test database.
+Exits 1 when a query degrades to a sequential scan, 2 when the dataset is too small.
+"""
+import argparse
+import json
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import func, select
+from sqlalchemy.dialects import postgresql
+from models import SessionLocal, Task, TaskUser, TaskCategory
+from routes.tasks import apply_task_filters
+from services.task_row_service import select_tasks
+
+# Relations that must never be read in full by a hot query
+WATCHED_RELATIONS = {"task", "task_comment"}
+
+
+def hot_queries(db):
+    """(name, statement) pairs mirroring what the task endpoints send."""
+    user_id = db.execute(select(func.min(TaskUser.id))).scalar()
+    category_id = db.execute(select(func.min(TaskCategory.id))).scalar()
+    newest = (Task.created_at.desc(), Task.id.desc())
+
+    def board(params, limit=50):
+        query, rank = apply_task_filters(select_tasks(), params)
+        order = (rank.desc(), Task.created_at.desc()) if rank is not None else newest
+        return query.order_by(*order).limit(limit)
+
+    return [
+        ("board", board({})),
+        ("board assigned_to", board({"assigned_to": user_id})),
+        ("board created_by", board({"created_by": user_id})),
+        ("board priority", board({"priority": "urgent"})),
+        ("board category_id", board({"category_id": category_id})),
+        ("board uncategorized", board({"category_id": "none"})),
+        ("board status", board({"status": "in_progress"})),
+        ("board assigned_to + priority", board({"assigned_to": user_id, "priority": "high"})),
+        ("search", board({"search": "geomembrana"})),
+        ("search typo", board({"search": "geomenbrana"})),
+        ("archive", select_tasks().filter(
+            Task.status == "archived", Task.archived_at >= datetime.utcnow() - timedelta(days=30)
+        ).order_by(Task.archived_at.desc())),
+        ("changes", select_tasks().filter(Task.change_seq > 0, Task.status != "archived")
+            .order_by(Task.change_seq).limit(501)),
+    ]
+
+
+def seq_scans(plan):
+    """Relations read with a Seq Scan anywhere in an EXPLAIN (FORMAT JSON) plan tree."""
+    found = []
+    if plan.get("Node Type") == "Seq Scan" and plan.get("Relation Name") in WATCHED_RELATIONS:
+        found.append(plan["Relation Name"])
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def explain(db, statement):
+    compiled = statement.compile(dialect=postgresql.dialect())
+    connection = db.connection()
+    rows = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params).scalar()
+    return (json.loads(rows) if isinstance(rows, str) else rows)[0]["Plan"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-tasks", type=int, default=50_000,
+                        help="refuse to judge plans on a smaller task table")
+    parser.add_argument("--verbose", action="store_true", help="print every plan")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        total = db.execute(select(func.count()).select_from(Task)).scalar()
+        if total < args.min_tasks:
+            print(f"Only {total} tasks; seed at least {args.min_tasks} with python -m benchmarks.dataset")
+            return 2
+
+        failures = 0
+        for name, statement in hot_queries(db):
+            plan = explain(db, statement)
+            scanned = seq_scans(plan)
+            status = "SEQ SCAN on " + ", ".join(sorted(set(scanned))) if scanned else "ok"
+            print(f"{name:32} cost {plan['Total Cost']:>10.1f}   {status}")
+            if args.verbose:
+                print(json.dumps(plan, indent=2))
+            failures += bool(scanned)
+        return 1 if failures else 0
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+"""
+Import-time budget for the web app.
+
+Runs `python -X importtime -c "import app"` in a fresh interpreter (best of
+--runs), prints the slowest top-level imports and fails if the total exceeds
+the budget or if a module that must stay lazy was imported.
+
+    python -m benchmarks.import_time --budget-ms 600
+
+Exits 1 when over budget or when a lazy module leaks into startup.
+"""
+import argparse
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Only import jobs and token verification need these; they must not load with the app
+LAZY_MODULES = ("anthropic", "numpy", "google.auth.transport.requests", "google.auth.jwt")
+
+LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)$")
+
+
+def measure(target):
+    """{module: (self_us, cumulative_us, depth)} for one cold import of `target`."""
+    env = {**os.environ, "PYTHONDONTWRITEBYTECODE": "1"}
+    env.setdefault("DATABASE_URL", "postgresql://bench@localhost/impag_bench")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise SystemExit(f"import {target} failed:\n{result.stderr[-2000:]}")
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    return modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", default="app", help="module to import")
+    parser.add_argument("--budget-ms", type=float, default=600.0)
+    parser.add_argument("--runs", type=int, default=3, help="report the fastest of N cold imports")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    runs = [measure(args.target) for _ in range(args.runs)]
+    modules = min(runs, key=lambda m: m[args.target][1])
+    total_ms = modules[args.target][1] / 1000
+
+    top_level = sorted(
+        ((name, cumulative) for name, (_, cumulative, depth) in modules.items() if depth == 1),
+        key=lambda item: -item[1],
+    )
+    print(f"import {args.target}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for name, cumulative in top_level[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    leaked = [m for m in LAZY_MODULES if m in modules]
+    for name in leaked:
+        print(f"FAIL: {name} is imported at startup but must stay lazy")
+    if total_ms > args.budget_ms:
+        print(f"FAIL: {total_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+    return 1 if leaked or total_ms > args.budget_ms else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,100 @@
+"""
+Microbenchmark: serializing a large task list.
+
+  before: ORM objects -> serialize_task (nested serialize_user/serialize_category)
+          -> stdlib json with the isoformat() default hook
+  after:  Core rows -> serialize_task_row -> orjson
+  normalized: Core rows -> serialize_task_rows_normalized (?format=normalized) -> orjson
+
+Runs on synthetic in-memory data; no database needed.
+
+    python -m benchmarks.json_serialization --tasks 5000
+"""
+import argparse
+import statistics
+import time
+from datetime import datetime, date, timedelta, timezone
+from types import SimpleNamespace
+from flask import Flask
+from json_provider import CustomJSONProvider, OrjsonProvider
+from routes.tasks import serialize_task
+from services.task_row_service import (
+    TASK_FIELDS, USER_FIELDS, CATEGORY_FIELDS, serialize_task_row, serialize_task_rows_normalized
+)
+
+
+def make_data(n):
+    users = [
+        SimpleNamespace(id=i, email=f"user{i}@example.com", display_name=f"Usuario {i}", avatar_url=None, role="member")
+        for i in range(1, 4)
+    ]
+    categories = [
+        SimpleNamespace(id=i, name=f"Categoría {i}", color="#6366f1", icon="truck", sort_order=i)
+        for i in range(1, 9)
+    ]
+    now = datetime.now(timezone.utc)
+    objects, rows = [], []
+    for i in range(n):
+        creator, assignee, category = users[i % 3], users[(i + 1) % 3], categories[i % 8]
+        task = SimpleNamespace(
+            id=i, task_number=i % 300 + 1, title=f"Cotización geomembrana cliente {i}",
+            description="Pedir geotextil, falta factura y envío." if i % 2 else None,
+            status="pending", priority="medium", due_date=date(2026, 2, 20) if i % 3 else None,
+            category_id=category.id, created_by=creator.id, assigned_to=assignee.id,
+            completed_at=None, archived_at=None, created_at=now - timedelta(minutes=i),
+            last_updated=now, comment_count=i % 5,
+            creator=creator, assignee=assignee, category=category,
+        )
+        objects.append(task)
+        rows.append(
+            tuple(getattr(task, f) for f in TASK_FIELDS)
+            + (task.comment_count,)
+            + tuple(getattr(creator, f) for f in USER_FIELDS)
+            + tuple(getattr(assignee, f) for f in USER_FIELDS)
+            + tuple(getattr(category, f) for f in CATEGORY_FIELDS)
+        )
+    return objects, rows
+
+
+def bench(fn, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tasks", type=int, default=5000)
+    parser.add_argument("--runs", type=int, default=15)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    stdlib, fast = CustomJSONProvider(app), OrjsonProvider(app)
+    objects, rows = make_data(args.tasks)
+
+    def before():
+        return stdlib.dumps({"success": True, "data": [serialize_task(t) for t in objects]}).encode()
+
+    def after():
+        return fast.dumps_bytes({"success": True, "data": [serialize_task_row(r) for r in rows]})
+
+    def normalized():
+        return fast.dumps_bytes({"success": True, "data": serialize_task_rows_normalized(rows)})
+
+    assert stdlib.loads(before()) == fast.loads(after())
+
+    print(f"{args.tasks} tasks, median of {args.runs} runs")
+    baseline = bench(before, args.runs)
+    for label, fn in (("before (ORM objects + stdlib json)", before),
+                      ("after (Core rows + orjson)", after),
+                      ("normalized (Core rows + orjson)", normalized)):
+        ms = baseline if fn is before else bench(fn, args.runs)
+        size = len(fn()) / 1024
+        print(f"  {label:36} {ms:8.2f} ms  {size:9.1f} KiB   ({baseline / ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,252 @@
+"""
+Load-test scenarios against a seeded database (see benchmarks.dataset), run
+in-process through the Flask test client with Google sign-in and Anthropic
+replaced by the offline stubs in benchmarks.stubs.
+
+    DATABASE_URL=postgresql://localhost/impag_bench ARCHIVE_SCHEDULER=0 \\
+        python -m benchmarks.load --scenarios list_filters,search --requests 500 --concurrency 8
+
+Each scenario reports p50/p95/p99 latency, SQL statements per operation (from
+the Server-Timing header) and throughput. The report is written as JSON under
+benchmarks/results/ (or --out); pass --compare with an older report to print
+the change per scenario.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from sqlalchemy import func, select
+from benchmarks.dataset import BENCH_EMAIL, random_title
+from benchmarks.stubs import LocalGoogleTokens, start_anthropic_stub
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+SEARCH_TERMS = (
+    "geomembrana", "cotización malla", "malla sombra", "geomenbrana", "Popusa guía",
+    "factura", "Tepehuanes", "bomba riego", "plastico invernadero", "pago pendiente",
+)
+STATUS_CYCLE = {"pending": "in_progress", "in_progress": "done", "done": "pending"}
+
+
+class Context:
+    """Ids and auth headers the scenarios pick from, loaded once from the seeded database."""
+
+    def __init__(self, db, tokens, users):
+        from models import Task, TaskUser, TaskCategory
+
+        emails = [BENCH_EMAIL.format(i) for i in range(users)]
+        tokens.install(emails)
+        self.headers = [{"Authorization": f"Bearer {tokens.token(email)}"} for email in emails]
+        self.user_ids = db.execute(select(TaskUser.id).where(TaskUser.email.in_(emails))).scalars().all()
+        self.category_ids = db.execute(select(TaskCategory.id).where(TaskCategory.is_active)).scalars().all()
+        self.board = dict(db.execute(select(Task.id, Task.status).where(Task.status != "archived")).all())
+        self.dataset = dict(db.execute(select(Task.status, func.count()).group_by(Task.status)).all())
+        if not self.user_ids or not self.board:
+            raise SystemExit("No bench users or tasks found: run python -m benchmarks.dataset first")
+        self.lock = threading.Lock()
+
+
+class Recorder:
+    """Issues requests for one operation and sums the SQL statements reported by the app."""
+
+    def __init__(self, client, headers):
+        self.client = client
+        self.headers = headers
+        self.queries = 0
+        self.failed = False
+
+    def __call__(self, method, url, **kwargs):
+        response = self.client.open(url, method=method, headers=self.headers, **kwargs)
+        timing = response.headers.get("Server-Timing", "")
+        if 'desc="' in timing:
+            self.queries += int(timing.split('desc="')[1].split(" ")[0])
+        if response.status_code >= 400:
+            self.failed = True
+        return response
+
+
+def list_filters(call, ctx, rng):
+    combos = (
+        {},
+        {"status": "pending"},
+        {"assigned_to": rng.choice(ctx.user_ids)},
+        {"created_by": rng.choice(ctx.user_ids), "priority": "high"},
+        {"category_id": rng.choice(ctx.category_ids)},
+        {"category_id": "none"},
+        {"priority": "urgent", "assigned_to": rng.choice(ctx.user_ids)},
+        {"due_before": (date.today() + timedelta(days=7)).isoformat()},
+        {"cursor": ""},
+        {"cursor": "", "category_id": rng.choice(ctx.category_ids), "limit": 100},
+        {"format": "normalized"},
+    )
+    call("GET", "/tasks", query_string=rng.choice(combos))
+
+
+def search(call, ctx, rng):
+    call("GET", "/tasks", query_string={"search": rng.choice(SEARCH_TERMS)})
+
+
+def archive(call, ctx, rng):
+    call("GET", "/tasks/archive")
+
+
+def status_churn(call, ctx, rng):
+    with ctx.lock:
+        task_id = rng.choice(list(ctx.board))
+        new_status = STATUS_CYCLE[ctx.board[task_id]]
+        ctx.board[task_id] = new_status
+    call("PUT", f"/tasks/{task_id}/status", json={"status": new_status})
+
+
+def make_import(lines):
+    def run(call, ctx, rng):
+        text = "\n".join(f"{rng.randint(1, 400)}\t{random_title(rng)[0]}" for _ in range(lines))
+        response = call("POST", "/tasks/import", json={"text": text, "assigned_to": rng.choice(ctx.user_ids)})
+        if response.status_code != 202:
+            return
+        job_id = response.get_json()["data"]["id"]
+        # The job runs on the app's import worker threads; the operation ends when it does
+        while True:
+            status = call("GET", f"/tasks/import/{job_id}").get_json()["data"]["status"]
+            if status in ("done", "failed"):
+                call.failed = call.failed or status == "failed"
+                return
+            time.sleep(0.05)
+    return run
+
+
+SCENARIOS = {
+    "list_filters": list_filters,
+    "search": search,
+    "archive": archive,
+    "status_churn": status_churn,
+    "import_50": make_import(50),
+    "import_500": make_import(500),
+}
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_scenario(make_client, ctx, scenario, operations, concurrency, seed):
+    """Run `operations` of `scenario` on `concurrency` threads, each with its own make_client()."""
+    local = threading.local()
+
+    def operation(i):
+        if not hasattr(local, "client"):
+            local.client = make_client()
+        call = Recorder(local.client, ctx.headers[i % len(ctx.headers)])
+        start = time.perf_counter()
+        scenario(call, ctx, random.Random(seed * 100_003 + i))
+        return time.perf_counter() - start, call.queries, call.failed
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(operation, range(operations)))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(r[0] * 1000 for r in results)
+    queries = [r[1] for r in results]
+    return {
+        "operations": operations,
+        "errors": sum(1 for r in results if r[2]),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "queries_mean": round(sum(queries) / len(queries), 2),
+        "queries_max": max(queries),
+        "throughput_rps": round(operations / elapsed, 1),
+    }
+
+
+def git_commit():
+    try:
+        sha = subprocess.check_output(["git", "rev-parse", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+        dirty = bool(subprocess.check_output(["git", "status", "--porcelain"], text=True).strip())
+        return sha, dirty
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+
+
+def print_report(report, baseline=None):
+    print(f"{'scenario':14} {'ops':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'q/op':>6} {'ops/s':>8}")
+    for name, r in report["scenarios"].items():
+        line = (f"{name:14} {r['operations']:6} {r['errors']:4} {r['p50_ms']:9.2f} {r['p95_ms']:9.2f} "
+                f"{r['p99_ms']:9.2f} {r['queries_mean']:6.1f} {r['throughput_rps']:8.1f}")
+        old = (baseline or {}).get("scenarios", {}).get(name)
+        if old:
+            line += f"   p95 {(r['p95_ms'] / old['p95_ms'] - 1) * 100:+.0f}%  ops/s {(r['throughput_rps'] / old['throughput_rps'] - 1) * 100:+.0f}%"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="list_filters,search,archive,status_churn,import_50")
+    parser.add_argument("--requests", type=int, default=200, help="operations per scenario (imports: 1/20th)")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--users", type=int, default=5, help="bench users seeded by benchmarks.dataset")
+    parser.add_argument("--ai-latency", type=float, default=0.5, help="seconds per stubbed Claude call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="report path (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", help="earlier report to compare against")
+    args = parser.parse_args()
+
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}. Available: {', '.join(SCENARIOS)}")
+
+    tokens = LocalGoogleTokens()
+    stub = start_anthropic_stub(latency=args.ai_latency)
+
+    from app import app
+    from models import SessionLocal
+
+    db = SessionLocal()
+    try:
+        ctx = Context(db, tokens, args.users)
+    finally:
+        db.close()
+
+    sha, dirty = git_commit()
+    report = {
+        "commit": sha,
+        "dirty": dirty,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "dataset": ctx.dataset,
+        "settings": {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        "scenarios": {},
+    }
+    try:
+        for name in names:
+            operations = max(1, args.requests // 20) if name.startswith("import_") else args.requests
+            report["scenarios"][name] = run_scenario(app.test_client, ctx, SCENARIOS[name], operations, args.concurrency, args.seed)
+    finally:
+        stub.shutdown()
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{(sha or 'nogit')[:7]}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    print(f"Report written to {out}")
+
+
+if __name__ == "__main__":
+    main()
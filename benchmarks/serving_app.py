@@ -0,0 +1,16 @@
+"""
+Gunicorn entry point for benchmarks.serving_modes: the real app, accepting ID
+tokens signed with the driver's key (PEM file in BENCH_TOKEN_KEY) for the
+first BENCH_USERS bench users. Never deploy this.
+
+    gunicorn -c gunicorn.conf.py benchmarks.serving_app:app
+"""
+import os
+from app import app
+from benchmarks.dataset import BENCH_EMAIL
+from benchmarks.stubs import LocalGoogleTokens
+
+with open(os.environ["BENCH_TOKEN_KEY"], "rb") as f:
+    LocalGoogleTokens(private_pem=f.read()).install(
+        [BENCH_EMAIL.format(i) for i in range(int(os.getenv("BENCH_USERS", "5")))]
+    )
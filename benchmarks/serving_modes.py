@@ -0,0 +1,215 @@
+"""
+Throughput of the gunicorn worker classes (gthread vs gevent, and sync as the
+original deployment's baseline) on the same seeded database. For each mode it
+starts gunicorn with gunicorn.conf.py and the stub-authenticated app
+(benchmarks.serving_app), holds --streams /events connections open the way
+browser tabs do, and runs the benchmarks.load scenarios over real HTTP. Claude calls go to the local stub with --ai-latency.
+
+    DATABASE_URL=postgresql://localhost/impag_bench \\
+        python -m benchmarks.serving_modes --workers 1 --concurrency 64 --streams 8
+
+A sync worker serves one request at a time and refuses /events streams, so
+compare it with --streams 0:
+
+    DATABASE_URL=postgresql://localhost/impag_bench \\
+        python -m benchmarks.serving_modes --modes sync,gthread,gevent --streams 0
+
+The report is written as JSON under benchmarks/results/ (or --out) and each
+mode's throughput is printed relative to the first one.
+"""
+import argparse
+import importlib.util
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+import requests
+from benchmarks.load import RESULTS_DIR, SCENARIOS, Context, git_commit, run_scenario
+from benchmarks.stubs import LocalGoogleTokens, start_anthropic_stub
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Packages a worker class needs beyond the defaults
+MODE_REQUIREMENTS = {"sync": (), "gthread": (), "gevent": ("gevent", "psycogreen")}
+
+
+class HttpClient:
+    """The subset of the Flask test client the load scenarios use, over HTTP."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def open(self, url, method="GET", headers=None, query_string=None, json=None):
+        response = self.session.request(method, self.base_url + url, headers=headers,
+                                        params=query_string, json=json, timeout=120)
+        response.get_json = response.json
+        return response
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(mode, args, key_path):
+    port = free_port()
+    env = {
+        **os.environ,
+        "GUNICORN_WORKER_CLASS": mode,
+        "WEB_CONCURRENCY": str(args.workers),
+        "GUNICORN_THREADS": str(args.threads),
+        "PORT": str(port),
+        "ARCHIVE_SCHEDULER": "0",
+        "BENCH_TOKEN_KEY": key_path,
+        "BENCH_USERS": str(args.users),
+        "CLAUDE_API_KEY": "bench-key",
+    }
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "benchmarks.serving_app:app"],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"gunicorn ({mode}) exited with {process.returncode}")
+        try:
+            if requests.get(base_url + "/health", timeout=1).ok:
+                return process, base_url
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise SystemExit(f"gunicorn ({mode}) did not become ready")
+
+
+def hold_streams(base_url, headers, count, stop):
+    """Open `count` /events streams and read them until `stop` is set. Returns the threads."""
+    def listen(header):
+        try:
+            with requests.get(base_url + "/events", headers=header, stream=True, timeout=(5, None)) as response:
+                for _ in response.iter_lines():
+                    if stop.is_set():
+                        return
+        except requests.RequestException:
+            pass
+
+    threads = [
+        threading.Thread(target=listen, args=(headers[i % len(headers)],), daemon=True)
+        for i in range(count)
+    ]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+def run_mode(mode, args, ctx, names, key_path):
+    process, base_url = start_server(mode, args, key_path)
+    stop = threading.Event()
+    try:
+        hold_streams(base_url, ctx.headers, args.streams, stop)
+        time.sleep(1)
+        results = {}
+        for name in names:
+            operations = max(1, args.requests // 20) if name.startswith("import_") else args.requests
+            results[name] = run_scenario(lambda: HttpClient(base_url), ctx, SCENARIOS[name],
+                                         operations, args.concurrency, args.seed)
+        return results
+    finally:
+        stop.set()
+        process.terminate()
+        process.wait(timeout=30)
+
+
+def print_report(report):
+    modes = list(report["modes"])
+    print(f"{'scenario':14} {'mode':8} {'ops':>6} {'err':>4} {'p50 ms':>9} {'p95 ms':>9} {'ops/s':>8}")
+    for name in report["modes"][modes[0]]:
+        first = report["modes"][modes[0]][name]
+        for mode in modes:
+            r = report["modes"][mode][name]
+            line = (f"{name:14} {mode:8} {r['operations']:6} {r['errors']:4} {r['p50_ms']:9.2f} "
+                    f"{r['p95_ms']:9.2f} {r['throughput_rps']:8.1f}")
+            if mode != modes[0]:
+                line += f"   ops/s {(r['throughput_rps'] / first['throughput_rps'] - 1) * 100:+.0f}%"
+            print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modes", default="gthread,gevent", help="gunicorn worker classes to compare (gthread, gevent, sync)")
+    parser.add_argument("--scenarios", default="list_filters,search,status_churn,import_50")
+    parser.add_argument("--requests", type=int, default=500, help="operations per scenario (imports: 1/20th)")
+    parser.add_argument("--concurrency", type=int, default=64, help="concurrent client connections")
+    parser.add_argument("--streams", type=int, default=8,
+                        help="/events streams held open during the run (each holds a gthread thread)")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--threads", type=int, default=16, help="GUNICORN_THREADS for gthread")
+    parser.add_argument("--users", type=int, default=5, help="bench users seeded by benchmarks.dataset")
+    parser.add_argument("--ai-latency", type=float, default=0.5, help="seconds per stubbed Claude call")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--out", help="report path (default: benchmarks/results/<time>-<commit>-serving.json)")
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    names = [n.strip() for n in args.scenarios.split(",") if n.strip()]
+    unknown = set(names) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}. Available: {', '.join(SCENARIOS)}")
+    if "sync" in modes and args.streams:
+        raise SystemExit("sync workers cannot hold /events streams: run it with --streams 0")
+    for mode in modes:
+        missing = [p for p in MODE_REQUIREMENTS.get(mode, ()) if importlib.util.find_spec(p) is None]
+        if missing:
+            raise SystemExit(f"{mode} needs {', '.join(missing)} (pip install -r requirements.txt)")
+
+    tokens = LocalGoogleTokens()
+    # Started here and inherited through ANTHROPIC_BASE_URL: threads would not survive gunicorn's fork
+    stub = start_anthropic_stub(latency=args.ai_latency)
+
+    from models import SessionLocal
+
+    db = SessionLocal()
+    try:
+        ctx = Context(db, tokens, args.users)
+    finally:
+        db.close()
+
+    sha, dirty = git_commit()
+    report = {
+        "commit": sha,
+        "dirty": dirty,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "dataset": ctx.dataset,
+        "settings": {k: v for k, v in vars(args).items() if k != "out"},
+        "modes": {},
+    }
+    with tempfile.NamedTemporaryFile(suffix=".pem") as key_file:
+        key_file.write(tokens.private_pem)
+        key_file.flush()
+        try:
+            for mode in modes:
+                print(f"running {mode} ...", flush=True)
+                report["modes"][mode] = run_mode(mode, args, ctx, names, key_file.name)
+        finally:
+            stub.shutdown()
+
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S}-{(sha or 'nogit')[:7]}-serving.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print_report(report)
+    print(f"Report written to {out}")
+
+
+if __name__ == "__main__":
+    main()
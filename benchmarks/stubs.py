@@ -0,0 +1,127 @@
+"""
+Offline stand-ins for the two external services a request can reach:
+
+- Google sign-in: a local RSA key signs ID tokens, and auth.token_verifier is
+  swapped for a TokenVerifier whose transport serves the matching public key, so
+  the real verification path (cert cache, jwt.decode, claims cache) still runs.
+- Anthropic: a local HTTP server answering POST /v1/messages with a verdict for
+  every INDEX in the prompt, after an optional artificial delay. The SDK is
+  pointed at it through ANTHROPIC_BASE_URL.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from google.auth import crypt, jwt
+
+BENCH_CLIENT_ID = "bench-client.apps.googleusercontent.com"
+KEY_ID = "bench"
+
+
+class LocalGoogleTokens:
+    """Signs Google-shaped ID tokens and serves the public key like the certs endpoint."""
+
+    def __init__(self, client_id=BENCH_CLIENT_ID, private_pem=None):
+        """Pass `private_pem` (another instance's) to accept the same tokens in a second process."""
+        self.client_id = client_id
+        if private_pem is None:
+            private_pem = rsa.generate_private_key(public_exponent=65537, key_size=2048).private_bytes(
+                serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+            )
+        key = serialization.load_pem_private_key(private_pem, password=None)
+        self.private_pem = private_pem
+        public_pem = key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        )
+        self._signer = crypt.RSASigner.from_string(private_pem, key_id=KEY_ID)
+        self._certs = json.dumps({KEY_ID: public_pem.decode()}).encode()
+
+    def transport(self, url, method="GET", **kwargs):
+        return SimpleNamespace(status=200, data=self._certs, headers={"cache-control": "public, max-age=3600"})
+
+    def token(self, email, lifetime=3600):
+        now = int(time.time())
+        return jwt.encode(self._signer, {
+            "iss": "https://accounts.google.com",
+            "aud": self.client_id,
+            "sub": hashlib.sha256(email.encode()).hexdigest()[:21],
+            "email": email,
+            "email_verified": True,
+            "name": email.split("@")[0],
+            "iat": now,
+            "exp": now + lifetime,
+        }).decode()
+
+    def install(self, emails):
+        """Make auth accept this key's tokens for `emails`."""
+        import auth
+
+        auth.token_verifier = auth.TokenVerifier(self.client_id, transport=self.transport)
+        for email in emails:
+            if email not in auth.allowed_emails:
+                auth.allowed_emails.append(email)
+
+
+INDEX_PATTERN = re.compile(r"INDEX=(\d+).*?\n((?:\s+candidate ID=\d+.*\n?)*)")
+CANDIDATE_PATTERN = re.compile(r"candidate ID=(\d+)")
+
+
+class StubAnthropicHandler(BaseHTTPRequestHandler):
+    """Answers the dedup prompt: roughly one incoming task in five is a duplicate of its first candidate."""
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("content-length", 0))))
+        prompt = body["messages"][0]["content"]
+        verdicts = []
+        for index, candidates in INDEX_PATTERN.findall(prompt):
+            first = CANDIDATE_PATTERN.search(candidates)
+            duplicate = first is not None and int(index) % 5 == 0
+            verdicts.append({
+                "index": int(index),
+                "is_duplicate": duplicate,
+                "matched_existing_id": int(first.group(1)) if duplicate else None,
+                "reason": "Misma tarea" if duplicate else "Tarea nueva",
+            })
+        time.sleep(self.server.latency)
+
+        payload = json.dumps({
+            "id": "msg_bench",
+            "type": "message",
+            "role": "assistant",
+            "model": body.get("model", "bench"),
+            "content": [{"type": "text", "text": json.dumps(verdicts)}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(prompt) // 4, "output_tokens": 20 * len(verdicts)},
+        }).encode()
+        self.send_response(200)
+        self.send_header("content-type", "application/json")
+        self.send_header("content-length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_anthropic_stub(latency=0.0):
+    """
+    Serve the stub on a free local port and point the Anthropic SDK and the import
+    service at it. Returns the server; call shutdown() when done.
+    """
+    import services.import_service as import_service
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubAnthropicHandler)
+    server.daemon_threads = True
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, name="anthropic-stub", daemon=True).start()
+
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    import_service.claude_api_key = "bench-key"
+    return server
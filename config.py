@@ -11,3 +11,55 @@ allowed_emails = [
     for e in os.getenv("ALLOWED_EMAILS", "").split(",")
     if e.strip()
 ]
+
+# SQLAlchemy pool per process (gunicorn.conf.py derives them per worker from
+# DB_MAX_CONNECTIONS when unset)
+db_pool_size = int(os.getenv("DB_POOL_SIZE", "5"))
+db_max_overflow = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+
+# Max number of verified ID tokens kept in memory by auth.require_auth
+token_cache_size = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+
+# Seconds a resolved task_user stays in the in-process identity cache
+task_user_cache_ttl = int(os.getenv("TASK_USER_CACHE_TTL", "300"))
+
+# Background auto-archival of done tasks (set ARCHIVE_SCHEDULER=0 when running
+# `python -m services.archive_service` from cron instead)
+archive_scheduler_enabled = os.getenv("ARCHIVE_SCHEDULER", "1") != "0"
+archive_interval_seconds = int(os.getenv("ARCHIVE_INTERVAL_SECONDS", "600"))
+
+# Threads per web process running import jobs; 0 leaves them to
+# `python -m services.import_job_service`
+import_worker_threads = int(os.getenv("IMPORT_WORKER_THREADS", "2"))
+# Seconds after which a 'running' import job is presumed dead and picked up again
+import_job_stale_seconds = int(os.getenv("IMPORT_JOB_STALE_SECONDS", "900"))
+# Seconds between each web process's checks for jobs it did not submit itself
+# (queued before a restart, or stale)
+import_job_poll_seconds = int(os.getenv("IMPORT_JOB_POLL_SECONDS", "30"))
+
+# AI duplicate detection: ambiguous lines per Claude request, and requests in flight
+dedup_chunk_size = int(os.getenv("DEDUP_CHUNK_SIZE", "20"))
+dedup_concurrency = int(os.getenv("DEDUP_CONCURRENCY", "4"))
+
+# Persisted duplicate-detection verdicts: unused entries expire after the TTL,
+# and the least recently used are dropped beyond the max
+dedup_cache_ttl_days = int(os.getenv("DEDUP_CACHE_TTL_DAYS", "30"))
+dedup_cache_max_entries = int(os.getenv("DEDUP_CACHE_MAX_ENTRIES", "5000"))
+
+# JSON encoder for responses: auto (orjson if installed), orjson or stdlib
+json_provider = os.getenv("JSON_PROVIDER", "auto")
+
+# Server-sent events: idle seconds between keep-alive comments on /events
+events_heartbeat_seconds = int(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+# Open /events streams per process; past it /events answers 503 with Retry-After.
+# Under gthread each stream holds a worker thread (gunicorn.conf.py derives the
+# cap from the worker's concurrency when unset)
+events_max_subscribers = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "8"))
+# Seconds a ticket from POST /events/ticket stays valid for opening /events
+events_ticket_ttl = int(os.getenv("EVENTS_TICKET_TTL", "60"))
+# Key signing stream tickets. Set it when several instances serve /events; when
+# unset, a random key is made at import and shared by the workers of one master
+events_ticket_secret = os.getenv("EVENTS_TICKET_SECRET")
+
+# Bearer token required by GET /metrics (unset: open, e.g. behind a private network)
+metrics_token = os.getenv("METRICS_TOKEN")
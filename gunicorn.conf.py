@@ -0,0 +1,84 @@
+# Gunicorn settings: gunicorn -c gunicorn.conf.py app:app
+#
+# The app is imported once in the master (preload_app) and forked, so workers
+# start without re-importing anything. Each worker then drops any pooled
+# connections inherited from the master and starts its own background threads.
+#
+# GUNICORN_WORKER_CLASS=gevent serves each request on a greenlet instead of a
+# thread: blocking socket I/O (Postgres via psycogreen, Google certs, Anthropic)
+# yields to other requests, so one worker holds many concurrent requests and
+# open /events streams. CPU-bound work (the import prefilter) still holds the
+# worker while it runs. The default stays gthread.
+#
+# GUNICORN_WORKER_CLASS=sync (the original deployment) serves one request at a
+# time per worker, so it refuses /events streams rather than let one hold the worker.
+
+import importlib
+import os
+
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+gevent_mode = worker_class == "gevent"
+sync_mode = worker_class == "sync"
+
+if gevent_mode:
+    # Patch before the app is preloaded below, so every module (ssl, socket,
+    # threading, queue, select) is imported in its cooperative form
+    from gevent import monkey
+    monkey.patch_all()
+    from psycogreen.gevent import patch_psycopg
+    patch_psycopg()
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8001')}"
+# One worker by default: /metrics (metrics.REGISTRY) lives in process memory, so
+# with several workers each scrape reports whichever worker answered and counters
+# appear to jump backwards. Scale with threads (or gevent) first; if you raise
+# WEB_CONCURRENCY, scrape every worker separately or read the numbers as per-worker
+workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+# Threads per worker (gthread); long-lived /events streams each hold one. Gunicorn
+# quietly runs gthread for a sync worker_class with more than one thread
+threads = 1 if sync_mode else int(os.getenv("GUNICORN_THREADS", "16"))
+# Concurrent requests per worker (gevent)
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))
+timeout = 120
+preload_app = True
+
+# Database connections this instance may open, split across workers. Explicit
+# DB_POOL_SIZE / DB_MAX_OVERFLOW win. Per worker, add one connection for /events
+# (LISTEN) on top of the pool. Under gevent requests beyond the pool wait for a
+# connection (pool_wait in Server-Timing) rather than opening more.
+db_max_connections = int(os.getenv("DB_MAX_CONNECTIONS", "20"))
+per_worker = max(2, db_max_connections // workers)
+concurrency = worker_connections if gevent_mode else threads
+os.environ.setdefault("DB_POOL_SIZE", str(min(concurrency, max(1, per_worker // 2))))
+os.environ.setdefault("DB_MAX_OVERFLOW", str(per_worker - int(os.environ["DB_POOL_SIZE"])))
+
+# Open /events streams per worker. Under gthread each holds a thread, so half the
+# threads stay free for normal requests; greenlets are cheap; a sync worker has no room for any
+if gevent_mode:
+    os.environ.setdefault("EVENTS_MAX_SUBSCRIBERS", str(worker_connections // 2))
+else:
+    os.environ.setdefault("EVENTS_MAX_SUBSCRIBERS", str(0 if sync_mode else max(1, threads // 2)))
+
+# Imported in the master once the app is loaded, so every worker inherits them:
+# needed by the first authenticated request, but kept out of `import app`.
+# The Anthropic SDK and numpy stay lazy (only import jobs use them).
+WARM_IMPORTS = ("google.auth.jwt", "google.auth.transport.requests")
+
+
+def when_ready(server):
+    for module in WARM_IMPORTS:
+        importlib.import_module(module)
+
+
+def post_fork(server, worker):
+    from models import dispose_engine_after_fork
+
+    dispose_engine_after_fork()
+
+
+def post_worker_init(worker):
+    # After the worker's own setup (the gevent worker reinitialises its hub
+    # there), so background threads belong to the worker's event loop
+    from app import start_background_tasks
+
+    start_background_tasks()
@@ -0,0 +1,53 @@
+import hashlib
+from functools import wraps
+from flask import request, make_response
+from models import get_db, TableVersion
+
+
+def conditional_get(*tables):
+    """
+    Decorator for read endpoints whose response depends only on `tables` and the
+    query string. Adds a strong ETag and Last-Modified derived from table_version;
+    a matching If-None-Match / If-Modified-Since gets a 304 before the view runs.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            versions = _table_versions(tables)
+            if versions is None:
+                # Version triggers not installed: serve normally, uncached
+                return f(*args, **kwargs)
+
+            fingerprint = "|".join(
+                [request.path, request.query_string.decode()]
+                + [f"{name}:{version}" for name, version, _ in versions]
+            )
+            etag = hashlib.sha256(fingerprint.encode()).hexdigest()[:32]
+            last_modified = max(updated_at for _, _, updated_at in versions).replace(microsecond=0)
+
+            if request.if_none_match:
+                not_modified = request.if_none_match.contains(etag)
+            else:
+                not_modified = bool(request.if_modified_since) and last_modified <= request.if_modified_since
+
+            response = make_response("", 304) if not_modified else make_response(f(*args, **kwargs))
+            if response.status_code in (200, 304):
+                response.set_etag(etag)
+                response.last_modified = last_modified
+                # Browsers may keep the body but must revalidate every time
+                response.headers["Cache-Control"] = "private, no-cache"
+            return response
+        return decorated
+    return decorator
+
+
+def _table_versions(tables):
+    """[(table_name, version, updated_at)] sorted by name, or None if any table is untracked."""
+    db = next(get_db())
+    try:
+        rows = db.query(TableVersion.table_name, TableVersion.version, TableVersion.updated_at).filter(
+            TableVersion.table_name.in_(tables)
+        ).order_by(TableVersion.table_name).all()
+    finally:
+        db.close()
+    return rows if len(rows) == len(tables) else None
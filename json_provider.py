@@ -0,0 +1,62 @@
+import decimal
+from datetime import datetime, date
+from flask.json.provider import DefaultJSONProvider, JSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional: fall back to the stdlib provider
+    orjson = None
+
+
+class CustomJSONProvider(DefaultJSONProvider):
+    """Stdlib json provider; datetimes go through the (slow) default hook."""
+
+    def default(self, obj):
+        if isinstance(obj, datetime):
+            return obj.isoformat()
+        if isinstance(obj, date):
+            return obj.isoformat()
+        return super().default(obj)
+
+
+class OrjsonProvider(JSONProvider):
+    """
+    orjson-backed provider. Dates and datetimes are encoded natively, in the same
+    ISO 8601 form as isoformat(), and responses are built straight from bytes.
+    """
+
+    option = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self.option).decode()
+
+    def dumps_bytes(self, obj):
+        return orjson.dumps(obj, default=_default, option=self.option)
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj), mimetype="application/json")
+
+
+def _default(obj):
+    # Types orjson does not know natively, encoded as the stdlib provider does;
+    # anything else is a bug in the view and must fail loudly, not as its repr
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, decimal.Decimal):
+        return str(obj)
+    if hasattr(obj, "__html__"):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def get_json_provider_class(name="auto"):
+    """'orjson', 'stdlib', or 'auto' (orjson when installed)."""
+    if name == "stdlib" or (name == "auto" and orjson is None):
+        return CustomJSONProvider
+    if orjson is None:
+        raise RuntimeError("JSON_PROVIDER=orjson but orjson is not installed")
+    return OrjsonProvider
@@ -0,0 +1,203 @@
+import threading
+import time
+from contextvars import ContextVar
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+# Seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+# Statements per request
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 50, 100)
+
+
+class Histogram:
+    """Thread-safe Prometheus histogram with optional labels, rendered in text format."""
+
+    def __init__(self, name, help, buckets, labelnames=()):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.labelnames = tuple(labelnames)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        with self._lock:
+            series = self._series.get(labelvalues)
+            if series is None:
+                series = self._series[labelvalues] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted(self._series.items())
+            series = [(labels, list(values)) for labels, values in series]
+        for labelvalues, values in series:
+            labels = _labels(self.labelnames, labelvalues)
+            for bound, count in zip(self.buckets, values):
+                lines.append(f'{self.name}_bucket{_labels(self.labelnames, labelvalues, le=bound)} {count}')
+            lines.append(f'{self.name}_bucket{_labels(self.labelnames, labelvalues, le="+Inf")} {values[-1]}')
+            lines.append(f"{self.name}_sum{labels} {values[-2]}")
+            lines.append(f"{self.name}_count{labels} {values[-1]}")
+        return lines
+
+
+class Counter:
+    """Thread-safe Prometheus counter with optional labels."""
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for labelvalues, value in values:
+            lines.append(f"{self.name}{_labels(self.labelnames, labelvalues)} {value}")
+        return lines
+
+
+def _labels(names, values, le=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if le is not None:
+        pairs.append(f'le="{le}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+request_duration = Histogram(
+    "impag_http_request_duration_seconds", "Time spent handling a request.",
+    LATENCY_BUCKETS, ("endpoint", "method"),
+)
+request_db_duration = Histogram(
+    "impag_http_request_db_duration_seconds", "Time spent executing SQL during a request.",
+    LATENCY_BUCKETS, ("endpoint", "method"),
+)
+request_queries = Histogram(
+    "impag_http_request_queries", "SQL statements executed during a request.",
+    QUERY_COUNT_BUCKETS, ("endpoint", "method"),
+)
+requests_total = Counter(
+    "impag_http_requests_total", "Requests handled, by response status.",
+    ("endpoint", "method", "status"),
+)
+pool_checkout_wait = Histogram(
+    "impag_db_pool_checkout_wait_seconds",
+    "Time spent waiting for (or opening) a pooled database connection.",
+    POOL_WAIT_BUCKETS,
+)
+
+REGISTRY = (request_duration, request_db_duration, request_queries, requests_total, pool_checkout_wait)
+
+
+class RequestStats:
+    """SQL activity of the current request."""
+
+    __slots__ = ("queries", "db_seconds", "pool_wait_seconds")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+
+
+# Set for the duration of a request; background threads see None and are not counted
+current_stats: ContextVar = ContextVar("request_stats", default=None)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - start
+            pool_checkout_wait.observe(waited)
+            stats = current_stats.get()
+            if stats is not None:
+                stats.pool_wait_seconds += waited
+
+
+def instrument_engine(engine):
+    """Count statements and SQL time against the current request's RequestStats."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = current_stats.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # A failed statement never reaches after_cursor_execute
+        conn = context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+def init_request_metrics(app):
+    """
+    Track every request: SQL statements and time, pool waits and total latency go
+    into a Server-Timing header and the per-endpoint histograms.
+    """
+
+    @app.before_request
+    def start_request_stats():
+        g.request_started = time.perf_counter()
+        current_stats.set(RequestStats())
+
+    @app.after_request
+    def record_request_stats(response):
+        stats = current_stats.get()
+        if stats is None or "request_started" not in g:
+            return response
+        total = time.perf_counter() - g.request_started
+        current_stats.set(None)
+
+        response.headers.add(
+            "Server-Timing",
+            f'db;dur={stats.db_seconds * 1000:.2f};desc="{stats.queries} queries", '
+            f"pool;dur={stats.pool_wait_seconds * 1000:.2f}, "
+            f"total;dur={total * 1000:.2f}",
+        )
+
+        endpoint = request.endpoint or "unmatched"
+        request_duration.observe(total, endpoint, request.method)
+        request_db_duration.observe(stats.db_seconds, endpoint, request.method)
+        request_queries.observe(stats.queries, endpoint, request.method)
+        requests_total.inc(endpoint, request.method, response.status_code)
+        return response
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
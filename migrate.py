@@ -0,0 +1,144 @@
+"""
+Apply the SQL files in migrations/ in order, once each, under a lock.
+
+    python migrate.py              apply pending migrations
+    python migrate.py --status     list applied and pending migrations
+    python migrate.py --baseline 003
+                                   record 001..003 as applied without running them
+                                   (databases migrated by hand before this runner)
+
+MIGRATE_BASELINE=003 in the environment does the same as --baseline 003, for hosts
+where the only command that runs is the container's (the Dockerfile runs this
+script before gunicorn). Versions already recorded are never touched again, so
+the variable is harmless once the first deploy has recorded them.
+
+Applied versions are recorded in schema_migrations. Each file runs in one
+transaction together with its schema_migrations row; the BEGIN;/COMMIT; lines
+in the files are for running them by hand and are skipped here. A session
+advisory lock keeps concurrent deploys from applying the same file twice.
+"""
+import argparse
+import hashlib
+import os
+import re
+import sys
+from sqlalchemy import text
+from models import get_engine
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "migrations")
+MIGRATION_FILE = re.compile(r"^(\d{3})_[\w-]+\.sql$")
+
+# App-wide advisory lock key (see also 7310001-7310003)
+MIGRATION_LOCK_KEY = 7_310_004
+
+# Transaction control written for manual runs (psql -f); the runner owns the transaction
+TRANSACTION_LINE = re.compile(r"^\s*(BEGIN|COMMIT)\s*;\s*$", re.IGNORECASE | re.MULTILINE)
+
+CREATE_TABLE_SQL = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(10) PRIMARY KEY,
+        filename VARCHAR(200) NOT NULL,
+        checksum VARCHAR(64) NOT NULL,
+        applied_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
+    )
+"""
+
+
+def discover(directory=MIGRATIONS_DIR):
+    """[(version, filename, sql)] for every migration file, in version order."""
+    migrations = []
+    for filename in sorted(os.listdir(directory)):
+        match = MIGRATION_FILE.match(filename)
+        if match:
+            with open(os.path.join(directory, filename), encoding="utf-8") as f:
+                migrations.append((match.group(1), filename, f.read()))
+    versions = [version for version, _, _ in migrations]
+    if len(versions) != len(set(versions)):
+        raise SystemExit("Two migration files share a version number")
+    return migrations
+
+
+def checksum(sql):
+    return hashlib.sha256(sql.encode()).hexdigest()
+
+
+def applied_versions(conn):
+    return dict(conn.execute(text("SELECT version, checksum FROM schema_migrations")).all())
+
+
+def record(conn, version, filename, sql):
+    conn.execute(
+        text("INSERT INTO schema_migrations (version, filename, checksum) VALUES (:v, :f, :c)"),
+        {"v": version, "f": filename, "c": checksum(sql)},
+    )
+
+
+def migrate(conn, migrations, baseline=None):
+    """Apply (or, up to `baseline`, just record) every migration not yet in schema_migrations."""
+    applied = applied_versions(conn)
+    conn.commit()
+
+    if not applied and baseline is None:
+        existing = conn.execute(text("SELECT to_regclass('public.task') IS NOT NULL")).scalar()
+        if existing:
+            raise SystemExit(
+                "Tables exist but schema_migrations is empty. Record the migrations already applied "
+                "by hand with --baseline <version> or MIGRATE_BASELINE first (002 deletes all tasks)."
+            )
+
+    for version, filename, sql in migrations:
+        if version in applied:
+            if applied[version] != checksum(sql):
+                print(f"warning: {filename} changed after it was applied")
+            continue
+        if baseline is not None and version <= baseline:
+            record(conn, version, filename, sql)
+            conn.commit()
+            print(f"baselined {filename}")
+            continue
+
+        print(f"applying {filename} ...", flush=True)
+        try:
+            # no_parameters: the files contain literal % signs, not placeholders
+            conn.exec_driver_sql(TRANSACTION_LINE.sub("", sql), execution_options={"no_parameters": True})
+            record(conn, version, filename, sql)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            print(f"failed: {filename}", file=sys.stderr)
+            raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--status", action="store_true", help="show applied/pending migrations and exit")
+    parser.add_argument("--baseline", metavar="VERSION", default=os.getenv("MIGRATE_BASELINE") or None,
+                        help="mark migrations up to VERSION as applied (default: $MIGRATE_BASELINE)")
+    args = parser.parse_args()
+
+    migrations = discover()
+    baseline = args.baseline.zfill(3) if args.baseline else None
+
+    with get_engine().connect() as conn:
+        conn.execute(text(CREATE_TABLE_SQL))
+        conn.commit()
+
+        if args.status:
+            applied = applied_versions(conn)
+            for version, filename, _ in migrations:
+                print(f"{'applied' if version in applied else 'pending':8} {filename}")
+            return
+
+        # Session-level lock: held across the per-file transactions until we disconnect
+        conn.execute(text("SELECT pg_advisory_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+        conn.commit()
+        try:
+            migrate(conn, migrations, baseline)
+        finally:
+            conn.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": MIGRATION_LOCK_KEY})
+            conn.commit()
+    print("migrations up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+-- ============================================================
+-- Composite index for keyset pagination on GET /tasks
+-- Pages are ordered by (created_at DESC, id DESC) and continue
+-- with WHERE (created_at, id) < (:cursor_created_at, :cursor_id),
+-- so each page is a bounded range scan on this index.
+-- ============================================================
+
+BEGIN;
+
+CREATE INDEX idx_task_created_at_id
+  ON task (created_at DESC, id DESC);
+
+COMMIT;
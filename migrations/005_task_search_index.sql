@@ -0,0 +1,23 @@
+-- ============================================================
+-- Indexed search for GET /tasks?search=
+-- search_vector: weighted Spanish full-text (title A, description B),
+--   kept up to date by Postgres as a generated column.
+-- pg_trgm GIN indexes: serve ILIKE '%term%' and the fuzzy
+--   similarity operator (title % term) without a sequential scan.
+-- ============================================================
+
+BEGIN;
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE task ADD COLUMN search_vector TSVECTOR
+  GENERATED ALWAYS AS (
+    setweight(to_tsvector('spanish', coalesce(title, '')), 'A') ||
+    setweight(to_tsvector('spanish', coalesce(description, '')), 'B')
+  ) STORED;
+
+CREATE INDEX idx_task_search_vector ON task USING GIN (search_vector);
+CREATE INDEX idx_task_title_trgm ON task USING GIN (title gin_trgm_ops);
+CREATE INDEX idx_task_description_trgm ON task USING GIN (description gin_trgm_ops);
+
+COMMIT;
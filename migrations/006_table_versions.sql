@@ -0,0 +1,44 @@
+-- ============================================================
+-- Per-table change versions for ETag / conditional GET
+-- Every INSERT/UPDATE/DELETE statement on a tracked table bumps
+-- its row in table_version, so read endpoints can tell whether
+-- anything changed with a single primary-key lookup.
+-- ============================================================
+
+BEGIN;
+
+CREATE TABLE table_version (
+    table_name VARCHAR(63) PRIMARY KEY,
+    version BIGINT DEFAULT 0 NOT NULL,
+    updated_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
+);
+
+INSERT INTO table_version (table_name) VALUES
+    ('task'), ('task_comment'), ('task_category'), ('task_user');
+
+CREATE FUNCTION bump_table_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE table_version
+    SET version = version + 1, updated_at = clock_timestamp()
+    WHERE table_name = TG_TABLE_NAME;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_task_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON task
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER trg_task_comment_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON task_comment
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER trg_task_category_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON task_category
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+CREATE TRIGGER trg_task_user_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON task_user
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+COMMIT;
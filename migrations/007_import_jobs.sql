@@ -0,0 +1,26 @@
+-- ============================================================
+-- Background import jobs for POST /tasks/import
+-- status: queued -> running -> done | failed
+-- ============================================================
+
+BEGIN;
+
+CREATE TABLE import_job (
+    id SERIAL PRIMARY KEY,
+    status VARCHAR(20) DEFAULT 'queued' NOT NULL,
+    text TEXT NOT NULL,
+    assigned_to INTEGER REFERENCES task_user(id),
+    created_by INTEGER NOT NULL REFERENCES task_user(id),
+    result JSONB,
+    error TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    started_at TIMESTAMPTZ,
+    finished_at TIMESTAMPTZ
+);
+
+-- Workers only ever look for unfinished jobs
+CREATE INDEX idx_import_job_pending
+  ON import_job (id)
+  WHERE status IN ('queued', 'running');
+
+COMMIT;
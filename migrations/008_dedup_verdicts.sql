@@ -0,0 +1,22 @@
+-- ============================================================
+-- Persisted duplicate-detection verdicts
+-- Keyed by sha256(normalized incoming title + fingerprint of the
+-- candidate existing tasks it was compared against).
+-- ============================================================
+
+BEGIN;
+
+CREATE TABLE dedup_verdict (
+    cache_key VARCHAR(64) PRIMARY KEY,
+    normalized_title VARCHAR(300) NOT NULL,
+    is_duplicate BOOLEAN NOT NULL,
+    matched_existing_id INTEGER REFERENCES task(id) ON DELETE CASCADE,
+    reason TEXT,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    last_used_at TIMESTAMPTZ DEFAULT NOW() NOT NULL
+);
+
+CREATE INDEX idx_dedup_verdict_matched ON dedup_verdict(matched_existing_id);
+CREATE INDEX idx_dedup_verdict_last_used ON dedup_verdict(last_used_at);
+
+COMMIT;
@@ -0,0 +1,62 @@
+-- ============================================================
+-- Change sequence for delta sync (GET /tasks/changes?since=)
+-- Every insert/update of a task stamps it with the next value of
+-- task_change_seq. Comment inserts/deletes touch their parent task
+-- (its comment_count changed); hard deletes leave a tombstone.
+--
+-- Stamping takes a transaction-scoped advisory lock first, so tasks
+-- are stamped in commit order: once a client has seen change_seq N,
+-- no transaction can still commit a smaller one.
+-- ============================================================
+
+BEGIN;
+
+CREATE SEQUENCE task_change_seq;
+
+ALTER TABLE task ADD COLUMN change_seq BIGINT;
+UPDATE task SET change_seq = nextval('task_change_seq');
+ALTER TABLE task ALTER COLUMN change_seq SET DEFAULT nextval('task_change_seq');
+ALTER TABLE task ALTER COLUMN change_seq SET NOT NULL;
+
+CREATE INDEX idx_task_change_seq ON task (change_seq);
+
+CREATE TABLE task_tombstone (
+    task_id INTEGER PRIMARY KEY,
+    change_seq BIGINT NOT NULL,
+    deleted_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE INDEX idx_task_tombstone_change_seq ON task_tombstone (change_seq);
+
+-- Advisory lock keys: 7310001 archival, 7310002 task numbers, 7310003 change stamping
+CREATE FUNCTION stamp_task_change() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(7310003);
+    IF TG_OP = 'DELETE' THEN
+        INSERT INTO task_tombstone (task_id, change_seq)
+        VALUES (OLD.id, nextval('task_change_seq'))
+        ON CONFLICT (task_id) DO UPDATE SET change_seq = EXCLUDED.change_seq, deleted_at = NOW();
+        RETURN OLD;
+    END IF;
+    NEW.change_seq := nextval('task_change_seq');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_task_change_seq
+    BEFORE INSERT OR UPDATE OR DELETE ON task
+    FOR EACH ROW EXECUTE FUNCTION stamp_task_change();
+
+CREATE FUNCTION touch_task_on_comment_change() RETURNS trigger AS $$
+BEGIN
+    -- No-op assignment; the task trigger above assigns the new change_seq
+    UPDATE task SET change_seq = change_seq WHERE id = COALESCE(NEW.task_id, OLD.task_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER trg_task_comment_touch_task
+    AFTER INSERT OR DELETE ON task_comment
+    FOR EACH ROW EXECUTE FUNCTION touch_task_on_comment_change();
+
+COMMIT;
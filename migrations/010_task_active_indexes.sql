@@ -0,0 +1,38 @@
+-- ============================================================
+-- Partial composite indexes for the board (GET /tasks)
+-- Board queries filter on status <> 'archived', usually narrow by
+-- one of assigned_to / created_by / priority / category_id / status,
+-- and order by (created_at DESC, id DESC) for both offset and cursor
+-- pages. Indexing only the active set keeps these small while the
+-- archive grows; each filtered page is a bounded range scan.
+-- The archive view gets its own partial index on archived_at.
+-- Checked by: python -m benchmarks.explain_check
+-- ============================================================
+
+BEGIN;
+
+CREATE INDEX idx_task_active_created_at
+  ON task (created_at DESC, id DESC) WHERE status <> 'archived';
+
+CREATE INDEX idx_task_active_assigned_to
+  ON task (assigned_to, created_at DESC, id DESC) WHERE status <> 'archived';
+
+CREATE INDEX idx_task_active_created_by
+  ON task (created_by, created_at DESC, id DESC) WHERE status <> 'archived';
+
+CREATE INDEX idx_task_active_priority
+  ON task (priority, created_at DESC, id DESC) WHERE status <> 'archived';
+
+-- Includes NULL category_id, so ?category_id=none uses it too
+CREATE INDEX idx_task_active_category_id
+  ON task (category_id, created_at DESC, id DESC) WHERE status <> 'archived';
+
+CREATE INDEX idx_task_active_status
+  ON task (status, created_at DESC, id DESC) WHERE status <> 'archived';
+
+CREATE INDEX idx_task_archived_recent
+  ON task (archived_at DESC) WHERE status = 'archived';
+
+ANALYZE task;
+
+COMMIT;
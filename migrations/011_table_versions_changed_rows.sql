@@ -0,0 +1,85 @@
+-- ============================================================
+-- Bump table_version only when a statement changed rows
+-- The statement triggers from 006 also fired for UPDATEs that
+-- matched nothing (the archive scheduler runs one every 10
+-- minutes), busting every ETag on the board. Each trigger now
+-- sees the affected rows through a transition table and bumps
+-- only when there are any. Transition tables need one trigger
+-- per event; TRUNCATE has none and still always bumps.
+-- ============================================================
+
+BEGIN;
+
+CREATE FUNCTION bump_table_version_if_changed() RETURNS trigger AS $$
+BEGIN
+    IF EXISTS (SELECT 1 FROM changed) THEN
+        UPDATE table_version
+        SET version = version + 1, updated_at = clock_timestamp()
+        WHERE table_name = TG_TABLE_NAME;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER trg_task_version ON task;
+DROP TRIGGER trg_task_comment_version ON task_comment;
+DROP TRIGGER trg_task_category_version ON task_category;
+DROP TRIGGER trg_task_user_version ON task_user;
+
+-- task
+CREATE TRIGGER trg_task_version_insert
+    AFTER INSERT ON task REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version_if_changed();
+CREATE TRIGGER trg_task_version_update
+    AFTER UPDATE ON task REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version_if_changed();
+CREATE TRIGGER trg_task_version_delete
+    AFTER DELETE ON task REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version_if_changed();
+CREATE TRIGGER trg_task_version_truncate
+    AFTER TRUNCATE ON task
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- task_comment
+CREATE TRIGGER trg_task_comment_version_insert
+    AFTER INSERT ON task_comment REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version_if_changed();
+CREATE TRIGGER trg_task_comment_version_update
+    AFTER UPDATE ON task_comment REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version_if_changed();
+CREATE TRIGGER trg_task_comment_version_delete
+    AFTER DELETE ON task_comment REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version_if_changed();
+CREATE TRIGGER trg_task_comment_version_truncate
+    AFTER TRUNCATE ON task_comment
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- task_category
+CREATE TRIGGER trg_task_category_version_insert
+    AFTER INSERT ON task_category REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version_if_changed();
+CREATE TRIGGER trg_task_category_version_update
+    AFTER UPDATE ON task_category REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version_if_changed();
+CREATE TRIGGER trg_task_category_version_delete
+    AFTER DELETE ON task_category REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version_if_changed();
+CREATE TRIGGER trg_task_category_version_truncate
+    AFTER TRUNCATE ON task_category
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+-- task_user
+CREATE TRIGGER trg_task_user_version_insert
+    AFTER INSERT ON task_user REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version_if_changed();
+CREATE TRIGGER trg_task_user_version_update
+    AFTER UPDATE ON task_user REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version_if_changed();
+CREATE TRIGGER trg_task_user_version_delete
+    AFTER DELETE ON task_user REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version_if_changed();
+CREATE TRIGGER trg_task_user_version_truncate
+    AFTER TRUNCATE ON task_user
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+
+COMMIT;
@@ -1,15 +1,23 @@
+import threading
 from sqlalchemy import (
-    Column, Integer, SmallInteger, String, DateTime, Boolean, Text, Date,
-    ForeignKey, create_engine
+    Column, Integer, SmallInteger, BigInteger, String, DateTime, Boolean, Text, Date,
+    ForeignKey, Computed, Sequence, column, create_engine, event, select, text
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.orm import (
+    declarative_base, sessionmaker, relationship, column_property, deferred, make_transient_to_detached
 )
-from sqlalchemy.orm import declarative_base, sessionmaker, relationship
 from sqlalchemy.sql import func
 from flask import request
-from config import database_url
+from cache import TTLCache
+from metrics import TimedQueuePool, instrument_engine
+from config import database_url, task_user_cache_ttl, db_pool_size, db_max_overflow
 from urllib.parse import urlparse, parse_qs, urlencode
 
 Base = declarative_base()
 
+task_change_seq = Sequence("task_change_seq", metadata=Base.metadata)
+
 
 class TaskUser(Base):
     __tablename__ = "task_user"
@@ -63,6 +71,14 @@ class Task(Base):
     archived_at = Column(DateTime(timezone=True), nullable=True, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     last_updated = Column(DateTime(timezone=True), onupdate=func.now())
+    # Maintained by Postgres (migration 005); deferred so regular loads don't fetch it
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('spanish', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('spanish', coalesce(description, '')), 'B')",
+        persisted=True,
+    )))
+    # Bumped by trigger on every insert/update (migration 009); drives GET /tasks/changes
+    change_seq = Column(BigInteger, server_default=task_change_seq.next_value(), nullable=False, index=True)
 
     creator = relationship("TaskUser", foreign_keys=[created_by], back_populates="tasks_created")
     assignee = relationship("TaskUser", foreign_keys=[assigned_to], back_populates="tasks_assigned")
@@ -85,29 +101,118 @@ class TaskComment(Base):
     user = relationship("TaskUser", back_populates="comments")
 
 
+# Comment count as a correlated aggregate (served by idx_task_comment_task_id),
+# so task lists never have to load comment rows just to count them
+Task.comment_count = column_property(
+    select(func.count(TaskComment.id))
+    .where(TaskComment.task_id == Task.id)
+    .correlate_except(TaskComment)
+    .scalar_subquery()
+)
+
+
+class TaskTombstone(Base):
+    """Hard-deleted task ids, recorded by trigger so delta sync can report them (migration 009)."""
+    __tablename__ = "task_tombstone"
+
+    task_id = Column(Integer, primary_key=True)
+    change_seq = Column(BigInteger, nullable=False, index=True)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class TableVersion(Base):
+    """Change counter per table, bumped by statement-level triggers (migration 006)."""
+    __tablename__ = "table_version"
+
+    table_name = Column(String(63), primary_key=True)
+    version = Column(BigInteger, default=0, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+class ImportJob(Base):
+    """Background import of pasted text (see services/import_job_service.py)."""
+    __tablename__ = "import_job"
+
+    id = Column(Integer, primary_key=True, index=True)
+    status = Column(String(20), default="queued", nullable=False)  # queued | running | done | failed
+    text = Column(Text, nullable=False)
+    assigned_to = Column(Integer, ForeignKey("task_user.id"), nullable=True)
+    created_by = Column(Integer, ForeignKey("task_user.id"), nullable=False)
+    result = Column(JSONB, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+
+class DedupVerdict(Base):
+    """Memoized duplicate-detection verdict (see services/dedup_cache_service.py)."""
+    __tablename__ = "dedup_verdict"
+
+    cache_key = Column(String(64), primary_key=True)
+    normalized_title = Column(String(300), nullable=False)
+    is_duplicate = Column(Boolean, nullable=False)
+    matched_existing_id = Column(Integer, ForeignKey("task.id", ondelete="CASCADE"), nullable=True, index=True)
+    reason = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+
 # --- Database connection (same Neon pattern as impag-quot) ---
+# Created on first use: importing the app opens no connections and runs no
+# queries. The schema comes from migrations/ (python migrate.py), not create_all.
 
-parsed_url = urlparse(database_url)
-endpoint_id = parsed_url.hostname.split('.')[0]
+_engine = None
+_engine_lock = threading.Lock()
+_session_factory = sessionmaker(autocommit=False, autoflush=False)
 
-query_params = parse_qs(parsed_url.query)
-query_params['options'] = [f'endpoint={endpoint_id}']
-new_query = urlencode(query_params, doseq=True)
 
-modified_url = parsed_url._replace(query=new_query).geturl()
-if not modified_url.startswith('postgresql+psycopg2://'):
-    modified_url = modified_url.replace('postgresql://', 'postgresql+psycopg2://')
+def engine_url(url=None):
+    """DATABASE_URL with the psycopg2 driver and, for Neon hosts, the endpoint option."""
+    parsed_url = urlparse(url or database_url)
+    query_params = parse_qs(parsed_url.query)
+    if parsed_url.hostname and parsed_url.hostname.endswith(".neon.tech"):
+        endpoint_id = parsed_url.hostname.split('.')[0]
+        query_params['options'] = [f'endpoint={endpoint_id}']
+    new_query = urlencode(query_params, doseq=True)
+
+    modified_url = parsed_url._replace(query=new_query).geturl()
+    if not modified_url.startswith('postgresql+psycopg2://'):
+        modified_url = modified_url.replace('postgresql://', 'postgresql+psycopg2://')
+    return modified_url
+
+
+def get_engine():
+    """The process-wide engine, created on first call."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                engine = create_engine(
+                    engine_url(),
+                    poolclass=TimedQueuePool,
+                    pool_pre_ping=True,
+                    pool_size=db_pool_size,
+                    max_overflow=db_max_overflow,
+                    connect_args={"application_name": "impag-tasks"}
+                )
+                instrument_engine(engine)
+                _engine = engine
+    return _engine
+
+
+def SessionLocal():
+    """New Session bound to the lazily created engine."""
+    return _session_factory(bind=get_engine())
 
-engine = create_engine(
-    modified_url,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-    connect_args={"application_name": "impag-tasks"}
-)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-Base.metadata.create_all(bind=engine)
+def dispose_engine_after_fork():
+    """
+    In a freshly forked worker, forget pooled connections inherited from the parent
+    without closing them (the parent still owns those sockets).
+    """
+    if _engine is not None:
+        _engine.dispose(close=False)
 
 
 def get_db():
@@ -118,20 +223,132 @@ def get_db():
         db.close()
 
 
+# --- Identity cache: email -> detached TaskUser snapshot ---
+
+task_user_cache = TTLCache(max_entries=256)
+
+
+def _snapshot_task_user(user):
+    """Copy the column values into a detached TaskUser that is safe to share across sessions."""
+    snapshot = TaskUser(
+        id=user.id,
+        email=user.email,
+        display_name=user.display_name,
+        avatar_url=user.avatar_url,
+        role=user.role,
+        is_active=user.is_active,
+        created_at=user.created_at,
+        last_updated=user.last_updated,
+    )
+    make_transient_to_detached(snapshot)
+    return snapshot
+
+
+def resolve_task_user(email, db=None):
+    """Return the active task_user for an email, from cache when possible. Unknown emails are not cached."""
+    user = task_user_cache.get(email)
+    if user is not None:
+        return user
+
+    session = db or SessionLocal()
+    try:
+        user = session.query(TaskUser).filter(
+            TaskUser.email == email,
+            TaskUser.is_active == True
+        ).first()
+        if not user:
+            return None
+        snapshot = _snapshot_task_user(user)
+    finally:
+        if db is None:
+            session.close()
+
+    task_user_cache.set(email, snapshot, task_user_cache.clock() + task_user_cache_ttl)
+    return snapshot
+
+
+def invalidate_task_user_cache():
+    task_user_cache.clear()
+
+
+@event.listens_for(TaskUser, "after_insert")
+@event.listens_for(TaskUser, "after_update")
+@event.listens_for(TaskUser, "after_delete")
+def _on_task_user_change(mapper, connection, target):
+    # The table is tiny; dropping everything also covers email changes
+    invalidate_task_user_cache()
+
+
 def get_current_task_user(db):
-    """Get the task_user record for the currently authenticated user."""
-    email = request.user_info["email"]
-    user = db.query(TaskUser).filter(
-        TaskUser.email == email,
-        TaskUser.is_active == True
-    ).first()
-    return user
-
-
-def get_next_task_number(db):
-    """Find the lowest available task_number (1-based) not used by any active task."""
-    used = {r[0] for r in db.query(Task.task_number).filter(Task.task_number.isnot(None)).all()}
-    n = 1
-    while n in used:
-        n += 1
-    return n
+    """Get the task_user record for the currently authenticated user (detached, cached snapshot)."""
+    return resolve_task_user(request.user_info["email"], db)
+
+
+# --- task_number allocation ---
+
+# App-wide advisory lock key serializing task_number allocation
+TASK_NUMBER_LOCK_KEY = 7_310_002
+
+# Free ranges below max(task_number), lowest first: lag() over an ordered scan of
+# idx_task_number_active finds each gap between consecutive numbers, and
+# ORDER BY task_number LIMIT stops the scan at the last gap needed instead of
+# reading every number. The last row is the open range above max(task_number).
+TASK_NUMBER_GAPS_SQL = """
+    SELECT prev + 1 AS first_free, task_number - 1 AS last_free
+    FROM (
+        SELECT task_number, lag(task_number, 1, CAST(0 AS SMALLINT)) OVER (ORDER BY task_number) AS prev
+        FROM task
+        WHERE task_number IS NOT NULL
+    ) used
+    WHERE task_number > prev + 1
+    ORDER BY task_number
+"""
+
+FREE_TASK_NUMBER_RANGES_SQL = text(f"""
+    (
+        {TASK_NUMBER_GAPS_SQL}
+        LIMIT :gaps
+    )
+    UNION ALL
+    SELECT coalesce(max(task_number), 0) + 1, NULL FROM task
+""")
+
+# The lowest free number, as one scalar: the first gap, else max + 1
+NEXT_TASK_NUMBER_SQL = text(f"""
+    SELECT coalesce(
+        (SELECT first_free FROM ({TASK_NUMBER_GAPS_SQL} LIMIT 1) AS first_gap),
+        (SELECT coalesce(max(task_number), 0) + 1 FROM task)
+    ) AS n
+""")
+
+
+def lock_task_numbers(db):
+    """Take the allocation lock; it is released when the transaction commits or rolls back."""
+    db.execute(select(func.pg_advisory_xact_lock(TASK_NUMBER_LOCK_KEY)))
+
+
+def reserve_task_numbers(db, count, exclude=()):
+    """
+    Return the `count` lowest task_numbers not used by any task and not in `exclude`.
+    Concurrent allocations wait on the lock until this transaction ends instead of
+    colliding on idx_task_number_active.
+    """
+    if count <= 0:
+        return []
+    lock_task_numbers(db)
+    exclude = set(exclude)
+    # Each gap holds at least one number, and `exclude` can rule out at most len(exclude)
+    ranges = db.execute(FREE_TASK_NUMBER_RANGES_SQL, {"gaps": count + len(exclude)}).all()
+    numbers = []
+    for first_free, last_free in sorted(ranges):
+        n = first_free
+        while len(numbers) < count and (last_free is None or n <= last_free):
+            if n not in exclude:
+                numbers.append(n)
+            n += 1
+    return numbers
+
+
+def next_task_number_subquery():
+    """The lowest free task_number as a scalar subquery for use inside a write. Take lock_task_numbers first."""
+    return NEXT_TASK_NUMBER_SQL.columns(column("n", Integer)).scalar_subquery()
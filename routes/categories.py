@@ -1,7 +1,9 @@
 from flask import Blueprint, jsonify, request
 from sqlalchemy import func
 from auth import require_auth
+from http_cache import conditional_get
 from models import get_db, TaskCategory, Task, get_current_task_user
+from services.event_service import emit_event
 
 categories_bp = Blueprint("categories", __name__)
 
@@ -22,6 +24,7 @@ def serialize_category(cat, task_count=0):
 @categories_bp.route("/", methods=["GET"])
 @categories_bp.route("", methods=["GET"])
 @require_auth
+@conditional_get("task_category", "task")
 def list_categories():
     db = next(get_db())
     try:
@@ -70,6 +73,8 @@ def create_category():
             sort_order=max_order + 1,
         )
         db.add(category)
+        db.flush()
+        emit_event(db, "category", "created", category.id)
         db.commit()
         db.refresh(category)
 
@@ -94,6 +99,7 @@ def reorder_categories():
             if cat:
                 cat.sort_order = idx
 
+        emit_event(db, "category", "reordered")
         db.commit()
         return jsonify({"success": True, "data": None, "error": None, "message": "Categories reordered"})
     finally:
@@ -120,6 +126,7 @@ def update_category(id):
             if field in body:
                 setattr(category, field, body[field])
 
+        emit_event(db, "category", "updated", id)
         db.commit()
         db.refresh(category)
 
@@ -141,6 +148,7 @@ def delete_category(id):
             return jsonify({"success": False, "data": None, "error": "Category not found", "message": None}), 404
 
         category.is_active = False
+        emit_event(db, "category", "deleted", id)
         db.commit()
 
         return jsonify({"success": True, "data": {"id": id}, "error": None, "message": "Category deleted"})
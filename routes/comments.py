@@ -2,6 +2,7 @@ from flask import Blueprint, jsonify, request
 from datetime import datetime
 from auth import require_auth
 from models import get_db, Task, TaskComment, get_current_task_user
+from services.event_service import emit_event
 
 comments_bp = Blueprint("comments", __name__)
 
@@ -73,6 +74,8 @@ def create_comment(task_id):
             content=body["content"].strip(),
         )
         db.add(comment)
+        db.flush()
+        emit_event(db, "comment", "created", comment.id, task_id=task_id)
         db.commit()
         db.refresh(comment)
 
@@ -106,6 +109,7 @@ def update_comment(task_id, comment_id):
 
         comment.content = body["content"].strip()
         comment.last_updated = datetime.utcnow()
+        emit_event(db, "comment", "updated", comment_id, task_id=task_id)
         db.commit()
         db.refresh(comment)
 
@@ -134,6 +138,7 @@ def delete_comment(task_id, comment_id):
             return jsonify({"success": False, "data": None, "error": "You can only delete your own comments", "message": None}), 403
 
         db.delete(comment)
+        emit_event(db, "comment", "deleted", comment_id, task_id=task_id)
         db.commit()
 
         return jsonify({"success": True, "data": {"id": comment_id}, "error": None, "message": "Comment deleted"})
@@ -0,0 +1,64 @@
+import json
+import queue
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from auth import authenticate_request, issue_stream_ticket, require_auth
+from config import events_heartbeat_seconds, events_ticket_ttl
+from services.event_service import broker
+
+events_bp = Blueprint("events", __name__)
+
+# Seconds a client turned away at the subscriber cap should wait before retrying
+FULL_RETRY_AFTER_SECONDS = 5
+
+
+@events_bp.route("/ticket", methods=["POST"])
+@require_auth
+def create_stream_ticket():
+    """Short-lived ticket for ?ticket= on GET /events. Fetch a new one whenever the stream has to reopen."""
+    return jsonify({
+        "success": True,
+        "data": {"ticket": issue_stream_ticket(request.user_info), "expires_in": events_ticket_ttl},
+        "error": None,
+        "message": None,
+    })
+
+
+@events_bp.route("/", methods=["GET"])
+@events_bp.route("", methods=["GET"])
+def stream_events():
+    """
+    Server-sent events for task, comment and category changes.
+    EventSource cannot set headers, so it authenticates with ?ticket= from
+    POST /events/ticket. Each event is `event: <type>` with a JSON body {type, action, id, ...}.
+    At EVENTS_MAX_SUBSCRIBERS open streams this process answers 503 with Retry-After.
+    """
+    error = authenticate_request(allow_stream_ticket=True)
+    if error:
+        return error
+
+    subscription = broker.subscribe()
+    if subscription is None:
+        response = jsonify({"success": False, "data": None, "error": "Too many open event streams", "message": None})
+        response.headers["Retry-After"] = str(FULL_RETRY_AFTER_SECONDS)
+        return response, 503
+
+    def generate():
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                try:
+                    payload = subscription.get(timeout=events_heartbeat_seconds)
+                except queue.Empty:
+                    # Comment line: keeps proxies from closing an idle stream
+                    yield ": keep-alive\n\n"
+                    continue
+                kind = json.loads(payload).get("type", "message")
+                yield f"event: {kind}\ndata: {payload}\n\n"
+        finally:
+            broker.unsubscribe(subscription)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,11 +1,21 @@
+import base64
+import binascii
+import json
 from flask import Blueprint, jsonify, request
-from sqlalchemy import func, or_
+from sqlalchemy import case, func, insert, select, true, tuple_, update
 from sqlalchemy.orm import joinedload
 from datetime import datetime, timedelta, date
 from auth import require_auth
-from models import get_db, Task, TaskUser, TaskCategory, TaskComment, get_current_task_user, get_next_task_number
-from services.archive_service import auto_archive_completed_tasks
-from services.import_service import parse_import_text, detect_duplicates_with_ai, create_imported_tasks
+from http_cache import conditional_get
+from models import (
+    get_db, Task, TaskComment, TaskTombstone, ImportJob, get_current_task_user, lock_task_numbers, next_task_number_subquery
+)
+from services.search_service import apply_task_search
+from services.import_service import parse_import_text
+from services.import_job_service import enqueue_import
+from services.task_bulk_service import BULK_FIELDS, bulk_update_tasks
+from services.task_write_service import status_transition_values, write_task
+from services.task_row_service import select_tasks, serialize_task_row, serialize_task_rows_normalized
 
 tasks_bp = Blueprint("tasks", __name__)
 
@@ -56,7 +66,110 @@ def serialize_task(task):
         "creator": serialize_user(task.creator),
         "assignee": serialize_user(task.assignee),
         "category": serialize_category(task.category),
-        "comment_count": len(task.comments) if task.comments else 0,
+        "comment_count": task.comment_count or 0,
+    }
+
+
+def serialize_task_list(rows):
+    """Task rows in the shape requested by ?format= (default: embedded, or normalized)."""
+    if request.args.get("format") == "normalized":
+        return serialize_task_rows_normalized(rows)
+    return [serialize_task_row(r) for r in rows]
+
+
+def encode_cursor(task):
+    raw = json.dumps([task.created_at.isoformat(), task.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Inverse of encode_cursor. Raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, task_id = json.loads(raw)
+        return datetime.fromisoformat(created_at), int(task_id)
+    except (TypeError, json.JSONDecodeError, UnicodeDecodeError, binascii.Error) as exc:
+        raise ValueError("Invalid cursor") from exc
+
+
+def apply_task_filters(query, params):
+    """
+    Apply the list_tasks filters in `params` (query args or a bulk "filter" object)
+    to a select over Task. Returns (filtered_query, search_rank or None).
+    """
+    # By default, exclude archived tasks
+    status_filter = params.get("status")
+    if status_filter:
+        query = query.filter(Task.status == status_filter)
+    else:
+        query = query.filter(Task.status != "archived")
+
+    # Filter: assigned_to
+    assigned_to = params.get("assigned_to")
+    if assigned_to:
+        query = query.filter(Task.assigned_to == int(assigned_to))
+
+    # Filter: created_by
+    created_by = params.get("created_by")
+    if created_by:
+        query = query.filter(Task.created_by == int(created_by))
+
+    # Filter: priority
+    priority = params.get("priority")
+    if priority:
+        query = query.filter(Task.priority == priority)
+
+    # Filter: category_id (0 or "none" means uncategorized)
+    category_id = params.get("category_id")
+    if category_id is not None:
+        if str(category_id) in ("0", "none"):
+            query = query.filter(Task.category_id.is_(None))
+        else:
+            query = query.filter(Task.category_id == int(category_id))
+
+    # Filter: due_before / due_after
+    due_before = params.get("due_before")
+    if due_before:
+        query = query.filter(Task.due_date <= date.fromisoformat(due_before))
+
+    due_after = params.get("due_after")
+    if due_after:
+        query = query.filter(Task.due_date >= date.fromisoformat(due_after))
+
+    # Filter: search (full-text + trigram, see services/search_service.py)
+    search = params.get("search")
+    search_rank = None
+    if search:
+        query, search_rank = apply_task_search(query, search)
+
+    return query, search_rank
+
+
+def encode_change_token(change_seq):
+    return base64.urlsafe_b64encode(f"v1:{change_seq}".encode()).decode().rstrip("=")
+
+
+def decode_change_token(token):
+    """Inverse of encode_change_token. Raises ValueError on anything malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError) as exc:
+        raise ValueError("Invalid since token") from exc
+    version, _, change_seq = raw.partition(":")
+    if version != "v1":
+        raise ValueError("Invalid since token")
+    return int(change_seq)
+
+
+def serialize_import_job(job):
+    return {
+        "id": job.id,
+        "status": job.status,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+        "result": None,
     }
 
 
@@ -68,17 +181,130 @@ def list_archive():
     try:
         cutoff = datetime.utcnow() - timedelta(days=30)
 
-        tasks = db.query(Task).options(
-            joinedload(Task.creator),
-            joinedload(Task.assignee),
-            joinedload(Task.category),
-            joinedload(Task.comments),
-        ).filter(
-            Task.status == "archived",
-            Task.archived_at >= cutoff
-        ).order_by(Task.archived_at.desc()).all()
+        rows = db.execute(
+            select_tasks().filter(
+                Task.status == "archived",
+                Task.archived_at >= cutoff
+            ).order_by(Task.archived_at.desc())
+        ).all()
 
-        return jsonify({"success": True, "data": [serialize_task(t) for t in tasks], "error": None, "message": None})
+        return jsonify({"success": True, "data": serialize_task_list(rows), "error": None, "message": None})
+    finally:
+        db.close()
+
+
+@tasks_bp.route("/changes", methods=["GET"])
+@require_auth
+def list_task_changes():
+    """
+    Delta sync. Without ?since=, returns the active board and a token. With a token,
+    returns tasks created/updated since then ("changed"), ids of tasks archived or
+    deleted since then ("removed"), and the next token. Page with has_more.
+    """
+    db = next(get_db())
+    try:
+        # Rows, horizon and tombstones must come from one snapshot: under READ
+        # COMMITTED a change committing between the statements would count in the
+        # horizon without being in the page, and the client would skip it for good
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        since_token = request.args.get("since")
+        limit = min(int(request.args.get("limit", 500)), 2000)
+        try:
+            since = decode_change_token(since_token) if since_token else 0
+        except ValueError:
+            return jsonify({"success": False, "data": None, "error": "Invalid since token", "message": None}), 400
+
+        query = select_tasks().add_columns(Task.change_seq).filter(Task.change_seq > since)
+        if not since_token:
+            # Initial snapshot: archived tasks are not on the board, nothing to remove
+            query = query.filter(Task.status != "archived")
+        rows = db.execute(query.order_by(Task.change_seq).limit(limit + 1)).all()
+
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        # Everything up to `horizon` has been delivered once this page is applied
+        if has_more:
+            horizon = rows[-1].change_seq
+        else:
+            horizon = db.execute(select(func.greatest(
+                select(func.max(Task.change_seq)).scalar_subquery(),
+                select(func.max(TaskTombstone.change_seq)).scalar_subquery(),
+                since,
+            ))).scalar()
+
+        tombstones = []
+        if since_token:
+            tombstones = db.execute(
+                select(TaskTombstone.task_id).where(
+                    TaskTombstone.change_seq > since,
+                    TaskTombstone.change_seq <= horizon,
+                )
+            ).scalars().all()
+
+        changed = [r for r in rows if r.status != "archived"]
+        removed = [r.id for r in rows if r.status == "archived"] + list(tombstones)
+
+        return jsonify({
+            "success": True,
+            "data": {
+                "changed": serialize_task_list(changed),
+                "removed": removed,
+                "next_since": encode_change_token(horizon),
+                "has_more": has_more,
+            },
+            "error": None,
+            "message": None,
+        })
+    finally:
+        db.close()
+
+
+@tasks_bp.route("/bulk", methods=["POST"])
+@require_auth
+def bulk_update():
+    """
+    Apply the same change to many tasks in one transaction. Body:
+      {"ids": [...]} or {"filter": {...list_tasks filters...}}
+      plus any of "status", "assigned_to", "category_id", "priority"
+    """
+    db = next(get_db())
+    try:
+        body = request.get_json()
+        if not body:
+            return jsonify({"success": False, "data": None, "error": "Request body is required", "message": None}), 400
+
+        changes = {k: body[k] for k in BULK_FIELDS if k in body}
+        if not changes:
+            return jsonify({"success": False, "data": None, "error": f"Nothing to change. Provide any of: {', '.join(BULK_FIELDS)}", "message": None}), 400
+        if "status" in changes and changes["status"] not in VALID_STATUSES:
+            return jsonify({"success": False, "data": None, "error": f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}", "message": None}), 400
+        if "priority" in changes and changes["priority"] not in VALID_PRIORITIES:
+            return jsonify({"success": False, "data": None, "error": "Invalid priority", "message": None}), 400
+
+        ids, filters = body.get("ids"), body.get("filter")
+        if (ids is None) == (filters is None):
+            return jsonify({"success": False, "data": None, "error": "Provide either ids or filter", "message": None}), 400
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(i, int) for i in ids):
+                return jsonify({"success": False, "data": None, "error": "ids must be a list of task ids", "message": None}), 400
+            target_ids = ids
+        else:
+            if not isinstance(filters, dict) or not filters:
+                return jsonify({"success": False, "data": None, "error": "filter must be a non-empty object", "message": None}), 400
+            try:
+                target_ids, _ = apply_task_filters(select(Task.id), filters)
+            except (TypeError, ValueError):
+                return jsonify({"success": False, "data": None, "error": "Invalid filter", "message": None}), 400
+
+        updated_ids = bulk_update_tasks(db, target_ids, changes)
+        db.commit()
+
+        rows = []
+        if updated_ids:
+            rows = db.execute(select_tasks().filter(Task.id.in_(updated_ids)).order_by(Task.id)).all()
+
+        return jsonify({"success": True, "data": serialize_task_list(rows), "error": None, "message": f"{len(updated_ids)} tasks updated"})
     finally:
         db.close()
 
@@ -100,59 +326,38 @@ def import_tasks():
         # Default assignee: Hernan (id=1) or override from body
         assigned_to = body.get("assigned_to", 1)
 
-        # Step 1: Parse incoming text
-        parsed = parse_import_text(text)
-        if not parsed:
+        # Parse up front only to reject unusable text; the job does the real work
+        if not parse_import_text(text):
             return jsonify({"success": False, "data": None, "error": "No tasks could be parsed from the text", "message": None}), 400
 
-        # Step 2: Fetch existing active tasks for duplicate comparison
-        existing_tasks = db.query(Task).filter(Task.status != "archived").all()
-        existing_for_ai = [
-            {"id": t.id, "task_number": t.task_number, "title": t.title}
-            for t in existing_tasks
-        ]
-
-        # Step 3: AI duplicate detection
-        analyzed = detect_duplicates_with_ai(parsed, existing_for_ai)
-
-        # Step 4: Separate new vs duplicates
-        to_create = [t for t in analyzed if not t["is_duplicate"]]
-        duplicates = [t for t in analyzed if t["is_duplicate"]]
+        job = enqueue_import(db, text, assigned_to=assigned_to, created_by=current_user.id)
 
-        # Step 5: Create non-duplicate tasks
-        created_tasks = create_imported_tasks(db, to_create, assigned_to=assigned_to, created_by=current_user.id)
-        db.commit()
+        return jsonify({"success": True, "data": serialize_import_job(job), "error": None, "message": "Importación en cola"}), 202
+    finally:
+        db.close()
 
-        # Reload with relationships for response
-        created_ids = [t.id for t in created_tasks]
-        if created_ids:
-            created_tasks = db.query(Task).options(
-                joinedload(Task.creator),
-                joinedload(Task.assignee),
-                joinedload(Task.category),
-                joinedload(Task.comments),
-            ).filter(Task.id.in_(created_ids)).all()
 
-        return jsonify({
-            "success": True,
-            "data": {
-                "created": [serialize_task(t) for t in created_tasks],
-                "duplicates": [
-                    {
-                        "title": d["title"],
-                        "task_number": d.get("task_number"),
-                        "matched_existing_id": d.get("matched_existing_id"),
-                        "reason": d.get("match_reason"),
-                    }
-                    for d in duplicates
-                ],
-                "total_parsed": len(parsed),
-                "total_created": len(created_tasks),
-                "total_duplicates": len(duplicates),
-            },
-            "error": None,
-            "message": f"{len(created_tasks)} tareas creadas, {len(duplicates)} duplicadas omitidas",
-        })
+@tasks_bp.route("/import/<int:job_id>", methods=["GET"])
+@require_auth
+def get_import_job(job_id):
+    db = next(get_db())
+    try:
+        job = db.query(ImportJob).filter(ImportJob.id == job_id).first()
+        if not job:
+            return jsonify({"success": False, "data": None, "error": "Import job not found", "message": None}), 404
+
+        job_data = serialize_import_job(job)
+        message = None
+        if job.status == "done":
+            result = dict(job.result)
+            created_ids = result.pop("created_ids")
+            created_rows = []
+            if created_ids:
+                created_rows = db.execute(select_tasks().filter(Task.id.in_(created_ids))).all()
+            job_data["result"] = {"created": serialize_task_list(created_rows), **result}
+            message = f"{result['total_created']} tareas creadas, {result['total_duplicates']} duplicadas omitidas"
+
+        return jsonify({"success": True, "data": job_data, "error": None, "message": message})
     finally:
         db.close()
 
@@ -160,79 +365,46 @@ def import_tasks():
 @tasks_bp.route("/", methods=["GET"])
 @tasks_bp.route("", methods=["GET"])
 @require_auth
+@conditional_get("task", "task_comment", "task_user", "task_category")
 def list_tasks():
     db = next(get_db())
     try:
-        # Lazy archival: auto-archive tasks done for > 3 days
-        auto_archive_completed_tasks(db)
+        query, search_rank = apply_task_filters(select_tasks(), request.args)
 
-        query = db.query(Task).options(
-            joinedload(Task.creator),
-            joinedload(Task.assignee),
-            joinedload(Task.category),
-            joinedload(Task.comments),
-        )
+        limit = int(request.args.get("limit", 50))
+        if limit < 1:
+            # A cursor page of no rows would still point past rows[limit - 1]
+            return jsonify({"success": False, "data": None, "error": "limit must be at least 1", "message": None}), 400
+
+        # Keyset pagination: ?cursor= (empty for the first page) switches to an
+        # opaque (created_at, id) cursor, served by idx_task_created_at_id
+        cursor = request.args.get("cursor")
+        if cursor is not None:
+            if cursor:
+                try:
+                    cursor_created_at, cursor_id = decode_cursor(cursor)
+                except ValueError:
+                    return jsonify({"success": False, "data": None, "error": "Invalid cursor", "message": None}), 400
+                query = query.filter(
+                    tuple_(Task.created_at, Task.id) < tuple_(cursor_created_at, cursor_id)
+                )
 
-        # By default, exclude archived tasks
-        status_filter = request.args.get("status")
-        if status_filter:
-            query = query.filter(Task.status == status_filter)
-        else:
-            query = query.filter(Task.status != "archived")
+            rows = db.execute(query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit + 1)).all()
+            next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+            rows = rows[:limit]
 
-        # Filter: assigned_to
-        assigned_to = request.args.get("assigned_to")
-        if assigned_to:
-            query = query.filter(Task.assigned_to == int(assigned_to))
-
-        # Filter: created_by
-        created_by = request.args.get("created_by")
-        if created_by:
-            query = query.filter(Task.created_by == int(created_by))
-
-        # Filter: priority
-        priority = request.args.get("priority")
-        if priority:
-            query = query.filter(Task.priority == priority)
-
-        # Filter: category_id (0 or "none" means uncategorized)
-        category_id = request.args.get("category_id")
-        if category_id is not None:
-            if category_id in ("0", "none"):
-                query = query.filter(Task.category_id.is_(None))
-            else:
-                query = query.filter(Task.category_id == int(category_id))
-
-        # Filter: due_before / due_after
-        due_before = request.args.get("due_before")
-        if due_before:
-            query = query.filter(Task.due_date <= date.fromisoformat(due_before))
-
-        due_after = request.args.get("due_after")
-        if due_after:
-            query = query.filter(Task.due_date >= date.fromisoformat(due_after))
-
-        # Filter: search (ILIKE on title and description)
-        search = request.args.get("search")
-        if search:
-            search_term = f"%{search}%"
-            query = query.filter(
-                or_(
-                    Task.title.ilike(search_term),
-                    Task.description.ilike(search_term)
-                )
-            )
+            return jsonify({"success": True, "data": serialize_task_list(rows), "next_cursor": next_cursor, "error": None, "message": None})
 
-        # Pagination
+        # Offset pagination (older clients)
         skip = int(request.args.get("skip", 0))
-        limit = int(request.args.get("limit", 50))
 
-        # Order: priority (urgent first), due date (earliest first, nulls last), created date
-        tasks = query.order_by(
-            Task.created_at.desc()
-        ).offset(skip).limit(limit).all()
+        # Order: most relevant first when searching, then newest first
+        order = [Task.created_at.desc()]
+        if search_rank is not None:
+            order.insert(0, search_rank.desc())
+        rows = db.execute(query.order_by(*order).offset(skip).limit(limit)).all()
 
-        return jsonify({"success": True, "data": [serialize_task(t) for t in tasks], "error": None, "message": None})
+        return jsonify({"success": True, "data": serialize_task_list(rows), "error": None, "message": None})
     finally:
         db.close()
 
@@ -276,6 +448,7 @@ def get_task(id):
 @tasks_bp.route("", methods=["POST"])
 @require_auth
 def create_task():
+    """Two statements: the task-number lock, then INSERT ... RETURNING joined to users/category."""
     db = next(get_db())
     try:
         current_user = get_current_task_user(db)
@@ -290,7 +463,8 @@ def create_task():
         if priority not in VALID_PRIORITIES:
             return jsonify({"success": False, "data": None, "error": f"Invalid priority. Must be one of: {', '.join(VALID_PRIORITIES)}", "message": None}), 400
 
-        task = Task(
+        lock_task_numbers(db)
+        row = write_task(db, insert(Task).values(
             title=body["title"].strip(),
             description=body.get("description", "").strip() or None,
             priority=priority,
@@ -298,21 +472,11 @@ def create_task():
             category_id=body.get("category_id"),
             assigned_to=body.get("assigned_to"),
             created_by=current_user.id,
-            task_number=get_next_task_number(db),
-        )
-        db.add(task)
+            task_number=next_task_number_subquery(),
+        ), "created")
         db.commit()
-        db.refresh(task)
 
-        # Eagerly load relationships for the response
-        task = db.query(Task).options(
-            joinedload(Task.creator),
-            joinedload(Task.assignee),
-            joinedload(Task.category),
-            joinedload(Task.comments),
-        ).filter(Task.id == task.id).first()
-
-        return jsonify({"success": True, "data": serialize_task(task), "error": None, "message": "Task created"}), 201
+        return jsonify({"success": True, "data": serialize_task_row(row), "error": None, "message": "Task created"}), 201
     finally:
         db.close()
 
@@ -320,52 +484,54 @@ def create_task():
 @tasks_bp.route("/<int:id>", methods=["PUT"])
 @require_auth
 def update_task(id):
+    """One statement: UPDATE ... RETURNING joined to users/category."""
     db = next(get_db())
     try:
-        task = db.query(Task).filter(Task.id == id).first()
-        if not task:
-            return jsonify({"success": False, "data": None, "error": "Task not found", "message": None}), 404
-
         body = request.get_json()
         if not body:
             return jsonify({"success": False, "data": None, "error": "Request body is required", "message": None}), 400
 
         # Update allowed fields
+        new_values = {}
         if "title" in body:
             title = body["title"].strip()
             if not title:
                 return jsonify({"success": False, "data": None, "error": "Title cannot be empty", "message": None}), 400
-            task.title = title
+            new_values["title"] = title
 
         if "description" in body:
-            task.description = body["description"].strip() if body["description"] else None
+            new_values["description"] = body["description"].strip() if body["description"] else None
 
         if "priority" in body:
             if body["priority"] not in VALID_PRIORITIES:
                 return jsonify({"success": False, "data": None, "error": f"Invalid priority", "message": None}), 400
-            task.priority = body["priority"]
+            new_values["priority"] = body["priority"]
 
         if "due_date" in body:
-            task.due_date = date.fromisoformat(body["due_date"]) if body["due_date"] else None
+            new_values["due_date"] = date.fromisoformat(body["due_date"]) if body["due_date"] else None
 
         if "category_id" in body:
-            task.category_id = body["category_id"]
+            new_values["category_id"] = body["category_id"]
 
         if "assigned_to" in body:
-            task.assigned_to = body["assigned_to"]
-
-        task.last_updated = datetime.utcnow()
+            new_values["assigned_to"] = body["assigned_to"]
+
+        new_values["last_updated"] = datetime.utcnow()
+
+        # The previous title decides whether cached dedup verdicts still hold
+        previous = select(Task.id, Task.title).where(Task.id == id).subquery("previous")
+        row = write_task(
+            db,
+            update(Task).where(Task.id == previous.c.id).values(new_values)
+            .returning(previous.c.title.label("previous_title")),
+            "updated",
+            invalidate_if=lambda written: written.c.title != written.c.previous_title,
+        )
+        if not row:
+            return jsonify({"success": False, "data": None, "error": "Task not found", "message": None}), 404
         db.commit()
 
-        # Reload with relationships
-        task = db.query(Task).options(
-            joinedload(Task.creator),
-            joinedload(Task.assignee),
-            joinedload(Task.category),
-            joinedload(Task.comments),
-        ).filter(Task.id == id).first()
-
-        return jsonify({"success": True, "data": serialize_task(task), "error": None, "message": "Task updated"})
+        return jsonify({"success": True, "data": serialize_task_row(row), "error": None, "message": "Task updated"})
     finally:
         db.close()
 
@@ -373,46 +539,39 @@ def update_task(id):
 @tasks_bp.route("/<int:id>/status", methods=["PUT"])
 @require_auth
 def update_task_status(id):
+    """
+    One UPDATE ... RETURNING joined to users/category; the transition rules are CASEs
+    on the row's previous status. Leaving the archive needs a fresh number, so any
+    non-archive transition first takes the task-number lock (two statements).
+    """
     db = next(get_db())
     try:
-        task = db.query(Task).filter(Task.id == id).first()
-        if not task:
-            return jsonify({"success": False, "data": None, "error": "Task not found", "message": None}), 404
-
         body = request.get_json()
         new_status = body.get("status") if body else None
         if not new_status or new_status not in VALID_STATUSES:
             return jsonify({"success": False, "data": None, "error": f"Invalid status. Must be one of: {', '.join(VALID_STATUSES)}", "message": None}), 400
 
-        old_status = task.status
-
-        # Status transition logic
-        task.status = new_status
-
-        if new_status == "done" and old_status != "done":
-            task.completed_at = datetime.utcnow()
-        elif new_status != "done" and old_status == "done":
-            task.completed_at = None
-
-        if new_status == "archived":
-            task.archived_at = datetime.utcnow()
-            task.task_number = None  # Release number for reuse
-        elif old_status == "archived" and new_status != "archived":
-            task.archived_at = None
-            task.task_number = get_next_task_number(db)  # Re-assign number
-
-        task.last_updated = datetime.utcnow()
+        new_values = status_transition_values(new_status, Task.status)
+        if new_status != "archived":
+            lock_task_numbers(db)
+            # Re-assign a number when leaving the archive
+            new_values["task_number"] = case(
+                (Task.status == "archived", next_task_number_subquery()), else_=Task.task_number
+            )
+        new_values["last_updated"] = datetime.utcnow()
+
+        row = write_task(
+            db,
+            update(Task).where(Task.id == id).values(new_values),
+            "status_changed",
+            invalidate_if=lambda written: written.c.status == "archived",
+            status=new_status,
+        )
+        if not row:
+            return jsonify({"success": False, "data": None, "error": "Task not found", "message": None}), 404
         db.commit()
 
-        # Reload with relationships
-        task = db.query(Task).options(
-            joinedload(Task.creator),
-            joinedload(Task.assignee),
-            joinedload(Task.category),
-            joinedload(Task.comments),
-        ).filter(Task.id == id).first()
-
-        return jsonify({"success": True, "data": serialize_task(task), "error": None, "message": f"Status changed to {new_status}"})
+        return jsonify({"success": True, "data": serialize_task_row(row), "error": None, "message": f"Status changed to {new_status}"})
     finally:
         db.close()
 
@@ -420,17 +579,20 @@ def update_task_status(id):
 @tasks_bp.route("/<int:id>", methods=["DELETE"])
 @require_auth
 def delete_task(id):
+    """One statement: archive, drop dedup verdicts and notify."""
     db = next(get_db())
     try:
-        task = db.query(Task).filter(Task.id == id).first()
-        if not task:
-            return jsonify({"success": False, "data": None, "error": "Task not found", "message": None}), 404
-
         # Soft delete: archive the task
-        task.status = "archived"
-        task.archived_at = datetime.utcnow()
-        task.task_number = None  # Release number for reuse
-        task.last_updated = datetime.utcnow()
+        row = write_task(
+            db,
+            update(Task).where(Task.id == id).values(
+                status_transition_values("archived", Task.status), last_updated=datetime.utcnow()
+            ),
+            "archived",
+            invalidate_if=lambda written: true(),
+        )
+        if not row:
+            return jsonify({"success": False, "data": None, "error": "Task not found", "message": None}), 404
         db.commit()
 
         return jsonify({"success": True, "data": {"id": id}, "error": None, "message": "Task archived"})
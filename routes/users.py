@@ -1,5 +1,6 @@
 from flask import Blueprint, jsonify
 from auth import require_auth
+from http_cache import conditional_get
 from models import get_db, TaskUser, get_current_task_user
 
 users_bp = Blueprint("users", __name__)
@@ -21,6 +22,7 @@ def serialize_user(user):
 @users_bp.route("/", methods=["GET"])
 @users_bp.route("", methods=["GET"])
 @require_auth
+@conditional_get("task_user")
 def list_users():
     db = next(get_db())
     try:
@@ -1,26 +1,89 @@
+import logging
+import threading
 from datetime import datetime, timedelta
-from models import Task
+from sqlalchemy import func, select, update
+from config import archive_interval_seconds
+from models import Task, SessionLocal
+from services.dedup_cache_service import invalidate_verdicts
+from services.event_service import emit_event
+
+logger = logging.getLogger(__name__)
+
+# App-wide advisory lock key: only one process archives at a time
+ARCHIVE_LOCK_KEY = 7_310_001
+
+_scheduler = None
 
 
 def auto_archive_completed_tasks(db):
     """
-    Move tasks that have been 'done' for more than 3 days to 'archived'.
-    Called lazily on task list requests.
+    Move tasks that have been 'done' for more than 3 days to 'archived' with a
+    single UPDATE ... RETURNING, then commit.
+    If another worker holds the archive lock, does nothing.
+    Returns the ids of the archived tasks.
     """
+    locked = db.execute(select(func.pg_try_advisory_xact_lock(ARCHIVE_LOCK_KEY))).scalar()
+    if not locked:
+        db.rollback()
+        return []
+
     cutoff = datetime.utcnow() - timedelta(days=3)
 
-    tasks_to_archive = db.query(Task).filter(
-        Task.status == "done",
-        Task.completed_at != None,
-        Task.completed_at <= cutoff
-    ).all()
+    archived_ids = db.execute(
+        update(Task)
+        .where(
+            Task.status == "done",
+            Task.completed_at != None,
+            Task.completed_at <= cutoff
+        )
+        .values(
+            status="archived",
+            archived_at=func.now(),
+            task_number=None,  # Release number for reuse
+            last_updated=func.now(),
+        )
+        .returning(Task.id)
+        .execution_options(synchronize_session=False)
+    ).scalars().all()
+    invalidate_verdicts(db, archived_ids)
+    if archived_ids:
+        emit_event(db, "task", "archived", ids=archived_ids)
+
+    db.commit()
+    return archived_ids
+
+
+def run_archive_cycle():
+    db = SessionLocal()
+    try:
+        return auto_archive_completed_tasks(db)
+    finally:
+        db.close()
+
+
+def start_archive_scheduler(interval=archive_interval_seconds):
+    """Run archival every `interval` seconds on a daemon thread. Safe to call more than once."""
+    global _scheduler
+    if _scheduler is not None:
+        return _scheduler
+
+    def loop():
+        while True:
+            try:
+                archived = run_archive_cycle()
+                if archived:
+                    logger.info("Archived %d completed tasks", len(archived))
+            except Exception:
+                logger.exception("Auto-archive cycle failed")
+            stop.wait(interval)
 
-    for task in tasks_to_archive:
-        task.status = "archived"
-        task.archived_at = datetime.utcnow()
-        task.task_number = None  # Release number for reuse
+    stop = threading.Event()
+    thread = threading.Thread(target=loop, name="archive-scheduler", daemon=True)
+    thread.start()
+    _scheduler = thread
+    return thread
 
-    if tasks_to_archive:
-        db.commit()
 
-    return len(tasks_to_archive)
+if __name__ == "__main__":
+    # One-shot entry point for cron / deploy hooks: python -m services.archive_service
+    print(f"Archived {len(run_archive_cycle())} tasks")
@@ -0,0 +1,112 @@
+import hashlib
+import logging
+from datetime import timedelta
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from config import dedup_cache_ttl_days, dedup_cache_max_entries
+from models import DedupVerdict, SessionLocal
+from services.similarity_service import normalize_title
+
+logger = logging.getLogger(__name__)
+
+
+def verdict_key(title: str, candidates: list[dict]) -> str:
+    """Cache key: the normalized incoming title plus a fingerprint of the candidates it was judged against."""
+    fingerprint = "\x1e".join(sorted(f"{c['id']}:{normalize_title(c['title'])}" for c in candidates))
+    return hashlib.sha256(f"{normalize_title(title)}\x1f{fingerprint}".encode()).hexdigest()
+
+
+def lookup_verdicts(db, keys: list[str]) -> dict[str, dict]:
+    """Fetch unexpired verdicts for `keys`. A plain read: mark hits used with record_verdicts."""
+    if not keys:
+        return {}
+    rows = db.execute(
+        select(DedupVerdict.cache_key, DedupVerdict.is_duplicate, DedupVerdict.matched_existing_id, DedupVerdict.reason)
+        .where(
+            DedupVerdict.cache_key.in_(keys),
+            DedupVerdict.last_used_at > func.now() - timedelta(days=dedup_cache_ttl_days),
+        )
+    ).all()
+    return {
+        key: {"is_duplicate": is_duplicate, "matched_existing_id": matched_id, "match_reason": reason}
+        for key, is_duplicate, matched_id, reason in rows
+    }
+
+
+def record_verdicts(used_keys: list[str], entries: list[tuple[str, str, dict]]):
+    """
+    Mark `used_keys` used and store new `entries` in a short transaction of their own.
+    Row locks on dedup_verdict must not live in an import job's transaction: task
+    writes delete verdicts while holding the change-stamping lock that the job
+    needs later to create its tasks. Best effort: a failure only loses memoization.
+    """
+    if not used_keys and not entries:
+        return
+    db = SessionLocal()
+    try:
+        if used_keys:
+            db.execute(
+                update(DedupVerdict)
+                .where(DedupVerdict.cache_key.in_(used_keys))
+                .values(last_used_at=func.now())
+                .execution_options(synchronize_session=False)
+            )
+        store_verdicts(db, entries)
+        db.commit()
+    except Exception:
+        db.rollback()
+        logger.exception("Could not record duplicate-detection verdicts")
+    finally:
+        db.close()
+
+
+def store_verdicts(db, entries: list[tuple[str, str, dict]]):
+    """Upsert (key, incoming title, verdict) entries, then evict stale/overflow rows."""
+    if entries:
+        stmt = insert(DedupVerdict).values([
+            {
+                "cache_key": key,
+                "normalized_title": normalize_title(title)[:300],
+                "is_duplicate": bool(verdict["is_duplicate"]),
+                "matched_existing_id": verdict["matched_existing_id"],
+                "reason": verdict["match_reason"],
+            }
+            for key, title, verdict in entries
+        ])
+        db.execute(stmt.on_conflict_do_update(
+            index_elements=[DedupVerdict.cache_key],
+            set_={
+                "is_duplicate": stmt.excluded.is_duplicate,
+                "matched_existing_id": stmt.excluded.matched_existing_id,
+                "reason": stmt.excluded.reason,
+                "last_used_at": func.now(),
+            },
+        ))
+    evict_verdicts(db)
+
+
+def evict_verdicts(db):
+    """Drop entries unused for longer than the TTL, then the least recently used beyond the size cap."""
+    db.execute(delete(DedupVerdict).where(
+        DedupVerdict.last_used_at <= func.now() - timedelta(days=dedup_cache_ttl_days)
+    ).execution_options(synchronize_session=False))
+    overflow = select(DedupVerdict.cache_key).order_by(DedupVerdict.last_used_at.desc()).offset(dedup_cache_max_entries)
+    db.execute(
+        delete(DedupVerdict).where(DedupVerdict.cache_key.in_(overflow)).execution_options(synchronize_session=False)
+    )
+
+
+def invalidate_verdicts_statement(task_ids):
+    """DELETE of the verdicts matching `task_ids` (a list or a SELECT of ids), e.g. to run as a CTE."""
+    return (
+        delete(DedupVerdict)
+        .where(DedupVerdict.matched_existing_id.in_(task_ids))
+        .execution_options(synchronize_session=False)
+    )
+
+
+def invalidate_verdicts(db, task_ids):
+    """Forget verdicts that matched tasks which were archived or renamed."""
+    task_ids = list(task_ids)
+    if task_ids:
+        db.execute(invalidate_verdicts_statement(task_ids))
@@ -0,0 +1,114 @@
+import json
+import logging
+import queue
+import select as select_io
+import threading
+import time
+from sqlalchemy import Text, cast, func, select
+from config import events_heartbeat_seconds, events_max_subscribers
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "impag_events"
+
+# Events buffered per subscriber before new ones are dropped for that (slow) client
+SUBSCRIBER_QUEUE_SIZE = 256
+
+# NOTIFY payloads must stay under 8000 bytes
+MAX_PAYLOAD_BYTES = 7500
+
+
+def emit_event(db, kind, action, id=None, **extra):
+    """
+    Queue a change notification in the current transaction. Postgres delivers it to
+    every listener when (and only if) the transaction commits.
+    """
+    payload = {"type": kind, "action": action, "id": id, **extra}
+    data = json.dumps(payload)
+    if len(data) > MAX_PAYLOAD_BYTES and "ids" in payload:
+        # Too many ids to list: clients treat a truncated event as "refetch"
+        payload["ids"], payload["truncated"] = None, True
+        data = json.dumps(payload)
+    db.execute(select(func.pg_notify(CHANNEL, data)))
+
+
+def notify_expression(kind, action, id_column, **extra):
+    """
+    Column expression sending the same payload as emit_event, for a write that
+    returns its row in one statement: select it alongside the (single) written row.
+    """
+    fields = ["type", kind, "action", action, "id", id_column]
+    for key, value in extra.items():
+        fields += [key, value]
+    return func.pg_notify(CHANNEL, cast(func.json_build_object(*fields), Text))
+
+
+class EventBroker:
+    """
+    One LISTEN connection per process, fanned out to in-memory subscriber queues.
+    The listener thread starts with the first subscriber, so it is created after
+    gunicorn forks its workers.
+    """
+
+    def __init__(self, channel=CHANNEL, max_subscribers=events_max_subscribers):
+        self.channel = channel
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self):
+        """A new subscriber queue, or None when this process already serves max_subscribers."""
+        q = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                return None
+            self._subscribers.add(q)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._listen_forever, name="event-listener", daemon=True)
+                self._thread.start()
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self, payload):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(payload)
+            except queue.Full:
+                pass
+
+    def _listen_forever(self):
+        while True:
+            try:
+                self._listen()
+            except Exception:
+                logger.exception("Event listener connection lost; reconnecting")
+                time.sleep(1)
+
+    def _listen(self):
+        from models import get_engine
+
+        # A dedicated connection, detached so it never goes back to the pool
+        conn = get_engine().raw_connection()
+        conn.detach()
+        dbapi_conn = conn.dbapi_connection
+        dbapi_conn.autocommit = True
+        try:
+            with dbapi_conn.cursor() as cursor:
+                cursor.execute(f"LISTEN {self.channel}")
+            while True:
+                if select_io.select([dbapi_conn], [], [], events_heartbeat_seconds) == ([], [], []):
+                    continue
+                dbapi_conn.poll()
+                while dbapi_conn.notifies:
+                    self.publish(dbapi_conn.notifies.pop(0).payload)
+        finally:
+            conn.close()
+
+
+broker = EventBroker()
@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import func, text
+from config import import_worker_threads, import_job_stale_seconds, import_job_poll_seconds
+from models import ImportJob, SessionLocal
+from services.import_service import run_import
+from services.event_service import emit_event
+
+logger = logging.getLogger(__name__)
+
+# Claim one unfinished job (optionally a specific one). SKIP LOCKED lets several
+# threads/processes poll concurrently; stale 'running' jobs are retried.
+CLAIM_JOB_SQL = text("""
+    UPDATE import_job SET status = 'running', started_at = now()
+    WHERE id = (
+        SELECT id FROM import_job
+        WHERE (status = 'queued'
+               OR (status = 'running' AND started_at < now() - make_interval(secs => :stale_seconds)))
+          AND (CAST(:job_id AS INTEGER) IS NULL OR id = :job_id)
+        ORDER BY id
+        FOR UPDATE SKIP LOCKED
+        LIMIT 1
+    )
+    RETURNING id
+""")
+
+_executor = None
+_executor_lock = threading.Lock()
+_poller = None
+
+
+def enqueue_import(db, text: str, assigned_to: int, created_by: int) -> ImportJob:
+    """Persist a queued job, commit, and hand it to this process's worker pool (if any)."""
+    job = ImportJob(text=text, assigned_to=assigned_to, created_by=created_by, status="queued")
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+
+    if import_worker_threads > 0:
+        _get_executor().submit(run_job, job.id)
+    return job
+
+
+def _get_executor():
+    # Created on first use so forked gunicorn workers each get their own threads
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=import_worker_threads, thread_name_prefix="import-job")
+        return _executor
+
+
+def claim_job(db, job_id=None):
+    """Mark the next runnable job as running. Returns its id, or None if there is nothing to do."""
+    claimed = db.execute(CLAIM_JOB_SQL, {"job_id": job_id, "stale_seconds": import_job_stale_seconds}).scalar()
+    db.commit()
+    return claimed
+
+
+def run_job(job_id=None):
+    """Claim and run one job. The created tasks and the 'done' status commit together."""
+    db = SessionLocal()
+    try:
+        job_id = claim_job(db, job_id)
+        if job_id is None:
+            return None
+
+        job = db.get(ImportJob, job_id)
+        try:
+            job.result = run_import(db, job.text, assigned_to=job.assigned_to, created_by=job.created_by)
+            job.status = "done"
+            if job.result["created_ids"]:
+                emit_event(db, "task", "created", ids=job.result["created_ids"])
+        except Exception as exc:
+            logger.exception("Import job %s failed", job_id)
+            db.rollback()
+            job = db.get(ImportJob, job_id)
+            job.status = "failed"
+            job.error = str(exc)
+        job.finished_at = func.now()
+        db.commit()
+        return job_id
+    finally:
+        db.close()
+
+
+def run_pending_jobs():
+    """Run claimable jobs until there are none left. Returns how many ran."""
+    ran = 0
+    while run_job() is not None:
+        ran += 1
+    return ran
+
+
+def start_import_poller(interval=import_job_poll_seconds):
+    """
+    Pick up jobs this process did not submit: queued before a deploy or restart,
+    or left 'running' by a dead worker. Checks at startup, then every `interval`
+    seconds on a daemon thread. Safe to call more than once.
+    """
+    global _poller
+    if _poller is not None:
+        return _poller
+
+    def loop():
+        while True:
+            try:
+                ran = run_pending_jobs()
+                if ran:
+                    logger.info("Picked up %d pending import jobs", ran)
+            except Exception:
+                logger.exception("Import job poll failed")
+            stop.wait(interval)
+
+    stop = threading.Event()
+    thread = threading.Thread(target=loop, name="import-job-poller", daemon=True)
+    thread.start()
+    _poller = thread
+    return thread
+
+
+def run_worker(poll_interval=2.0):
+    """Standalone worker loop: python -m services.import_job_service"""
+    while True:
+        try:
+            if run_job() is not None:
+                continue
+        except Exception:
+            logger.exception("Import worker iteration failed")
+        time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_worker()
@@ -1,9 +1,15 @@
 import re
+import csv
+import io
 import json
-import anthropic
-from config import claude_api_key
-from models import Task, get_next_task_number
-from datetime import datetime, date as date_type
+import time
+from sqlalchemy import Integer, SmallInteger, column, func, insert, select, update, values
+from concurrent.futures import ThreadPoolExecutor
+from config import claude_api_key, dedup_chunk_size, dedup_concurrency
+from models import Task, lock_task_numbers, reserve_task_numbers
+from services.similarity_service import prefilter_duplicates
+from services.dedup_cache_service import verdict_key, lookup_verdicts, record_verdicts
+from datetime import datetime, timezone, date as date_type
 
 
 # Regex for dates: d/m/yyyy, dd/mm/yyyy, d-m-yyyy, dd-mm-yyyy, yyyy-mm-dd
@@ -12,6 +18,13 @@ DATE_PATTERN = re.compile(
     r"|^(\d{4})[/\-](\d{1,2})[/\-](\d{1,2})$"  # y-m-d (ISO)
 )
 
+# Imports at least this large go through COPY instead of a multi-row INSERT
+COPY_THRESHOLD = 1000
+IMPORT_COLUMNS = ("title", "priority", "assigned_to", "created_by", "task_number", "status", "created_at")
+
+# Reason given when Claude could not be asked or answered garbage; such verdicts are never memoized
+ANALYSIS_ERROR_REASON = "Error al analizar duplicados"
+
 
 def _parse_date(s: str) -> date_type | None:
     """Try to parse a date string in common formats. Returns date or None."""
@@ -97,45 +110,76 @@ def parse_import_text(text: str) -> list[dict]:
     return parsed
 
 
-def detect_duplicates_with_ai(incoming_tasks: list[dict], existing_tasks: list[dict]) -> list[dict]:
+def detect_duplicates_with_ai(incoming_tasks: list[dict], existing_tasks: list[dict], client=None, db=None) -> list[dict]:
     """
-    Call Claude to determine which incoming tasks are duplicates of existing ones.
+    Determine which incoming tasks are duplicates of existing ones.
+    Exact/near-exact title matches and clearly unrelated lines are resolved locally
+    (services/similarity_service.py); only ambiguous lines go to Claude, each with
+    its most similar existing tasks, so the prompt does not grow with the backlog.
+    Ambiguous lines are sent in chunks of DEDUP_CHUNK_SIZE, up to DEDUP_CONCURRENCY at once.
+    `client` overrides the Anthropic client (e.g. one pointed at a local stub).
+    With `db`, verdicts are memoized in dedup_verdict and Claude only sees cache misses;
+    `db` is only read, cache writes commit separately (record_verdicts).
     Returns enriched incoming_tasks list with is_duplicate and matched_existing_id fields.
     """
-    if not claude_api_key:
-        # No API key — skip AI detection, mark all as non-duplicate
-        return [
-            {**t, "is_duplicate": False, "matched_existing_id": None, "match_reason": None}
-            for t in incoming_tasks
+    resolved, ambiguous = prefilter_duplicates(incoming_tasks, existing_tasks)
+
+    keys = {}
+    if db is not None and ambiguous:
+        keys = {i: verdict_key(incoming_tasks[i]["title"], candidates) for i, candidates in ambiguous.items()}
+        cached = lookup_verdicts(db, list(keys.values()))
+        for i, key in keys.items():
+            if key in cached:
+                resolved[i] = cached[key]
+                del ambiguous[i]
+
+    entries = []
+    if ambiguous and (client or claude_api_key):
+        if client is None:
+            # The SDK takes about a second to import; only import jobs pay for it
+            import anthropic
+            client = anthropic.Anthropic(api_key=claude_api_key)
+        items = list(ambiguous.items())
+        chunks = [dict(items[i:i + dedup_chunk_size]) for i in range(0, len(items), dedup_chunk_size)]
+        with ThreadPoolExecutor(max_workers=min(dedup_concurrency, len(chunks))) as pool:
+            for verdicts in pool.map(lambda chunk: _ask_claude(client, incoming_tasks, chunk), chunks):
+                resolved.update(verdicts)
+
+        entries = [
+            (keys[i], incoming_tasks[i]["title"], resolved[i])
+            for i in ambiguous
+            if i in keys and i in resolved and resolved[i]["match_reason"] != ANALYSIS_ERROR_REASON
         ]
 
-    if not existing_tasks:
-        # No existing tasks to compare against
-        return [
-            {**t, "is_duplicate": False, "matched_existing_id": None, "match_reason": None}
-            for t in incoming_tasks
-        ]
+    if keys:
+        record_verdicts([key for i, key in keys.items() if i not in ambiguous], entries)
 
-    # Build context for Claude
-    existing_list = "\n".join(
-        f"  ID={t['id']}, #{t['task_number'] or '?'}: {t['title']}"
-        for t in existing_tasks
-    )
+    return [
+        {**task, **resolved.get(i, {"is_duplicate": False, "matched_existing_id": None, "match_reason": None})}
+        for i, task in enumerate(incoming_tasks)
+    ]
 
+
+def _ask_claude(client, incoming_tasks: list[dict], ambiguous: dict[int, list[dict]]) -> dict[int, dict]:
+    """Ask Claude about one chunk of ambiguous incoming tasks. Returns {incoming index: verdict}."""
+    import anthropic
+
+    # Build context for Claude: each incoming task followed by its candidates
     incoming_list = "\n".join(
-        f"  INDEX={i}, #{t['task_number'] or '?'}: {t['title']}"
-        for i, t in enumerate(incoming_tasks)
+        f"  INDEX={i}, #{incoming_tasks[i]['task_number'] or '?'}: {incoming_tasks[i]['title']}\n"
+        + "\n".join(
+            f"      candidate ID={c['id']}, #{c['task_number'] or '?'}: {c['title']}"
+            for c in candidates
+        )
+        for i, candidates in ambiguous.items()
     )
 
     prompt = f"""You are a task deduplication assistant for a business task management system.
 
-EXISTING TASKS (already in the system):
-{existing_list}
-
-INCOMING TASKS (being imported):
+INCOMING TASKS (being imported), each followed by the most similar EXISTING tasks (already in the system):
 {incoming_list}
 
-For each INCOMING task, determine if it is a duplicate of an existing task. A task is a duplicate if:
+For each INCOMING task, determine if it is a duplicate of one of its candidate existing tasks. A task is a duplicate if:
 - It describes the same work/action, even if worded slightly differently
 - It refers to the same subject (e.g. same client, same product, same shipment)
 - Minor differences in wording, capitalization, or extra details do NOT make it different
@@ -146,108 +190,214 @@ If the tasks are about different subjects or different actions, they are NOT dup
 Return a JSON array with one object per incoming task (in the same order), each with:
 - "index": the INDEX number of the incoming task
 - "is_duplicate": true/false
-- "matched_existing_id": the ID of the matching existing task if duplicate, null otherwise
+- "matched_existing_id": the candidate ID of the matching existing task if duplicate, null otherwise
 - "reason": short explanation (in Spanish) of why it's a duplicate or why it's new
 
 Return ONLY the JSON array, no other text."""
 
-    client = anthropic.Anthropic(api_key=claude_api_key)
-    response = client.messages.create(
-        model="claude-sonnet-4-20250514",
-        max_tokens=4000,
-        temperature=0,
-        messages=[{"role": "user", "content": prompt}],
-    )
+    try:
+        response = client.messages.create(
+            model="claude-sonnet-4-20250514",
+            max_tokens=4000,
+            messages=[{"role": "user", "content": prompt}],
+            # Newer SDKs no longer take temperature as an argument; the API still does
+            extra_body={"temperature": 0},
+        )
 
-    # Parse Claude's response
-    response_text = response.content[0].text.strip()
-    # Remove markdown code fences if present
-    if response_text.startswith("```"):
-        response_text = re.sub(r"^```(?:json)?\n?", "", response_text)
-        response_text = re.sub(r"\n?```$", "", response_text)
+        # Parse Claude's response
+        response_text = response.content[0].text.strip()
+        # Remove markdown code fences if present
+        if response_text.startswith("```"):
+            response_text = re.sub(r"^```(?:json)?\n?", "", response_text)
+            response_text = re.sub(r"\n?```$", "", response_text)
 
-    try:
         results = json.loads(response_text)
-    except json.JSONDecodeError:
-        # Fallback: mark all as non-duplicate
-        return [
-            {**t, "is_duplicate": False, "matched_existing_id": None, "match_reason": "Error al analizar duplicados"}
-            for t in incoming_tasks
-        ]
-
-    # Merge AI results back into incoming tasks
-    enriched = []
-    for i, task in enumerate(incoming_tasks):
-        ai_result = next((r for r in results if r.get("index") == i), None)
+    except (anthropic.APIError, json.JSONDecodeError):
+        # Fallback: mark this chunk as non-duplicate
+        return {
+            i: {"is_duplicate": False, "matched_existing_id": None, "match_reason": ANALYSIS_ERROR_REASON}
+            for i in ambiguous
+        }
+
+    # Merge AI results back through an index -> result map
+    by_index = {r.get("index"): r for r in results if isinstance(r, dict)}
+    verdicts = {}
+    for i, candidates in ambiguous.items():
+        ai_result = by_index.get(i)
         if ai_result:
-            enriched.append({
-                **task,
-                "is_duplicate": ai_result.get("is_duplicate", False),
-                "matched_existing_id": ai_result.get("matched_existing_id"),
-                "match_reason": ai_result.get("reason"),
-            })
-        else:
-            enriched.append({
-                **task,
-                "is_duplicate": False,
-                "matched_existing_id": None,
-                "match_reason": None,
-            })
-
-    return enriched
+            verdicts[i] = _checked_verdict(ai_result, candidates)
+    return verdicts
 
 
-def create_imported_tasks(db, tasks_to_create: list[dict], assigned_to: int, created_by: int) -> list[Task]:
+def _checked_verdict(ai_result: dict, candidates: list[dict]) -> dict:
+    """
+    Claude's verdict for one line, with matched_existing_id checked against that
+    line's candidates. A #task_number given in place of the ID is mapped back to
+    its candidate; a duplicate naming no candidate is kept as new (and, with the
+    error reason, is not memoized) rather than dropped or stored with a bad id.
+    """
+    if not ai_result.get("is_duplicate"):
+        return {"is_duplicate": False, "matched_existing_id": None, "match_reason": ai_result.get("reason")}
+
+    matched = ai_result.get("matched_existing_id")
+    if isinstance(matched, str) and matched.lstrip("#").isdigit():
+        matched = int(matched.lstrip("#"))
+    by_id = {c["id"]: c for c in candidates}
+    by_number = {c["task_number"]: c for c in candidates if c.get("task_number") is not None}
+    candidate = None
+    if isinstance(matched, int) and not isinstance(matched, bool):
+        candidate = by_id.get(matched) or by_number.get(matched)
+    if candidate is None:
+        return {"is_duplicate": False, "matched_existing_id": None, "match_reason": ANALYSIS_ERROR_REASON}
+    return {"is_duplicate": True, "matched_existing_id": candidate["id"], "match_reason": ai_result.get("reason")}
+
+
+def run_import(db, text: str, assigned_to: int, created_by: int) -> dict:
     """
-    Bulk create tasks, handling task_number conflicts.
-    Returns list of created Task objects.
+    Full import pipeline: parse, detect duplicates, bulk-create the rest.
+    Does not commit. Returns a JSON-serializable summary with the created task ids.
     """
-    # Collect all incoming task_numbers so we can reserve them all at once
-    incoming_numbers = {t["task_number"] for t in tasks_to_create if t.get("task_number")}
+    # Step 1: Parse incoming text
+    parsed = parse_import_text(text)
+
+    # Step 2: Fetch existing active tasks for duplicate comparison
+    existing_for_ai = [
+        {"id": t.id, "task_number": t.task_number, "title": t.title}
+        for t in db.query(Task.id, Task.task_number, Task.title).filter(Task.status != "archived").all()
+    ]
+
+    # Step 3: AI duplicate detection
+    analyzed = detect_duplicates_with_ai(parsed, existing_for_ai, db=db)
+
+    # Step 4: Separate new vs duplicates
+    to_create = [t for t in analyzed if not t["is_duplicate"]]
+    duplicates = [t for t in analyzed if t["is_duplicate"]]
+
+    # Step 5: Create non-duplicate tasks
+    created_ids, import_timings = create_imported_tasks(db, to_create, assigned_to=assigned_to, created_by=created_by)
+
+    return {
+        "created_ids": created_ids,
+        "duplicates": [
+            {
+                "title": d["title"],
+                "task_number": d.get("task_number"),
+                "matched_existing_id": d.get("matched_existing_id"),
+                "reason": d.get("match_reason"),
+            }
+            for d in duplicates
+        ],
+        "total_parsed": len(parsed),
+        "total_created": len(created_ids),
+        "total_duplicates": len(duplicates),
+        "timings_ms": import_timings,
+    }
+
+
+def create_imported_tasks(db, tasks_to_create: list[dict], assigned_to: int, created_by: int) -> tuple[list[int], dict]:
+    """
+    Bulk create tasks, handling task_number conflicts, with a fixed number of statements:
+      1. find existing tasks that hold an incoming number
+      2. reserve every number still needed (renumbered conflicts + unnumbered rows) at once
+      3. renumber all conflicting tasks with one UPDATE
+      4. insert all rows with one multi-row INSERT ... RETURNING (COPY for very large batches)
+    Returns (created task ids, per-phase timings in ms).
+    """
+    timings = {}
+    start = time.perf_counter()
+
+    def phase(name):
+        nonlocal start
+        now = time.perf_counter()
+        timings[name] = round((now - start) * 1000, 2)
+        start = now
+
+    # Numbers are allocated under the task_number lock for the rest of the transaction
+    lock_task_numbers(db)
+
+    # The first line claiming a number keeps it; repeats get a fresh one
+    incoming_numbers = set()
+    unnumbered = []
+    for i, t in enumerate(tasks_to_create):
+        n = t.get("task_number")
+        if n and n not in incoming_numbers:
+            incoming_numbers.add(n)
+        else:
+            unnumbered.append(i)
 
-    # Phase 1: Renumber ALL conflicting existing tasks first
+    # Phase 1: existing tasks that must give up their number
+    conflicting_ids = []
     if incoming_numbers:
-        conflicting = db.query(Task).filter(
-            Task.task_number.in_(incoming_numbers),
-            Task.status != "archived",
-        ).all()
-
-        if conflicting:
-            # Build full set of numbers to avoid: currently used + all incoming
-            used = {r[0] for r in db.query(Task.task_number).filter(Task.task_number.isnot(None)).all()}
-            reserved = used | incoming_numbers
-
-            for task in conflicting:
-                # Find next available number that isn't reserved
-                n = 1
-                while n in reserved:
-                    n += 1
-                task.task_number = n
-                reserved.add(n)  # Mark as now taken
-
-            db.flush()  # Persist all renumberings before inserting new tasks
-
-    # Phase 2: Insert new tasks with their intended numbers
-    created = []
-    for t in tasks_to_create:
-        if t.get("task_number"):
-            task_number = t["task_number"]
-        else:
-            task_number = get_next_task_number(db)
+        conflicting_ids = db.execute(
+            select(Task.id).where(Task.task_number.in_(incoming_numbers)).order_by(Task.task_number)
+        ).scalars().all()
+    phase("find_conflicts")
+
+    # Phase 2: one allocation for everything that needs a new number
+    fresh = reserve_task_numbers(db, len(conflicting_ids) + len(unnumbered), exclude=incoming_numbers)
+    phase("reserve_numbers")
+
+    # Phase 3: renumber all conflicting tasks in one statement
+    if conflicting_ids:
+        renumber = values(
+            column("id", Integer), column("new_number", SmallInteger), name="renumber"
+        ).data(list(zip(conflicting_ids, fresh)))
+        db.execute(
+            update(Task)
+            .where(Task.id == renumber.c.id)
+            .values(task_number=renumber.c.new_number, last_updated=func.now())
+            .execution_options(synchronize_session=False)
+        )
+    phase("renumber")
 
+    # Phase 4: insert all new tasks
+    numbers = dict(zip(unnumbered, fresh[len(conflicting_ids):]))
+    now = datetime.now(timezone.utc)
+    rows = []
+    for i, t in enumerate(tasks_to_create):
         created_at = t.get("created_at")
-        task = Task(
-            title=t["title"],
-            priority=t.get("priority", "medium"),
-            assigned_to=assigned_to,
-            created_by=created_by,
-            task_number=task_number,
-            status="pending",
-        )
-        if created_at:
-            task.created_at = datetime.combine(created_at, datetime.min.time())
-        db.add(task)
-        db.flush()
-        created.append(task)
+        rows.append({
+            "title": t["title"],
+            "priority": t.get("priority", "medium"),
+            "assigned_to": assigned_to,
+            "created_by": created_by,
+            "task_number": numbers.get(i, t.get("task_number")),
+            "status": "pending",
+            "created_at": datetime.combine(created_at, datetime.min.time()) if created_at else now,
+        })
 
-    return created
+    if not rows:
+        created_ids = []
+    elif len(rows) >= COPY_THRESHOLD:
+        created_ids = _copy_insert_tasks(db, rows)
+    else:
+        created_ids = db.execute(
+            insert(Task).returning(Task.id, sort_by_parameter_order=True), rows
+        ).scalars().all()
+    phase("insert")
+
+    return created_ids, timings
+
+
+def _copy_insert_tasks(db, rows: list[dict]) -> list[int]:
+    """Stage rows with COPY into a temp table, then move them into task in one INSERT ... SELECT."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for i, row in enumerate(rows):
+        writer.writerow([i] + [row[c] for c in IMPORT_COLUMNS])
+    buffer.seek(0)
+
+    columns = ", ".join(IMPORT_COLUMNS)
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE import_staging ("
+            "ord INTEGER, title VARCHAR(300), priority VARCHAR(10), assigned_to INTEGER, "
+            "created_by INTEGER, task_number SMALLINT, status VARCHAR(20), created_at TIMESTAMPTZ"
+            ") ON COMMIT DROP"
+        )
+        cursor.copy_expert(f"COPY import_staging (ord, {columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+        cursor.execute(f"INSERT INTO task ({columns}) SELECT {columns} FROM import_staging ORDER BY ord RETURNING id")
+        return [r[0] for r in cursor.fetchall()]
+    finally:
+        cursor.close()
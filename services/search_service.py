@@ -0,0 +1,26 @@
+from sqlalchemy import func, or_
+from models import Task
+
+SEARCH_CONFIG = "spanish"
+
+
+def apply_task_search(query, term: str):
+    """
+    Restrict a Task query to rows matching a search term.
+    Matches full-text (Spanish stemming, GIN on search_vector), substrings and
+    typos (pg_trgm GIN on title/description), so no branch needs a sequential scan.
+    Returns (filtered_query, rank) where rank is a relevance expression to order by.
+    """
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, term)
+    pattern = f"%{term}%"
+
+    query = query.filter(
+        or_(
+            Task.search_vector.op("@@")(ts_query),
+            Task.title.ilike(pattern),
+            Task.description.ilike(pattern),
+            Task.title.op("%")(term),
+        )
+    )
+    rank = func.ts_rank_cd(Task.search_vector, ts_query) + func.similarity(Task.title, term)
+    return query, rank
@@ -0,0 +1,124 @@
+import re
+import unicodedata
+import zlib
+# Character trigrams are hashed into a fixed-width space so the matrix size
+# does not depend on the vocabulary of the backlog
+VECTOR_DIM = 4096
+
+# Best cosine similarity at or above which an incoming title is a duplicate without
+# asking the model, provided the only words that differ are FILLER_WORDS (any other
+# word, such as a client name, guide number or amount, can make it a different task)
+NEAR_DUPLICATE_THRESHOLD = 0.9
+# Words whose presence or absence never changes what a title refers to
+FILLER_WORDS = frozenset({"a", "al", "con", "de", "del", "el", "en", "la", "las", "lo", "los",
+                          "para", "por", "un", "una", "y"})
+# Best cosine similarity below which an incoming title is new without asking the model
+UNRELATED_THRESHOLD = 0.15
+# Existing tasks sent to the model as candidates for each ambiguous line
+TOP_K = 5
+
+
+def normalize_title(title: str) -> str:
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", title.lower())
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    return " ".join(text.split())
+
+
+def _trigram_ids(text: str) -> list[int]:
+    padded = f"  {text} "
+    return [zlib.crc32(padded[i:i + 3].encode()) % VECTOR_DIM for i in range(len(padded) - 2)]
+
+
+def trigram_tfidf(texts: list[str]):
+    """
+    L2-normalized TF-IDF rows over hashed character trigrams, in CSR form:
+    (indptr, indices, data), row r being indices/data[indptr[r]:indptr[r + 1]].
+    """
+    import numpy as np
+
+    rows, cols = [], []
+    for row, text in enumerate(texts):
+        ids = _trigram_ids(text)
+        rows.extend([row] * len(ids))
+        cols.extend(ids)
+    # One entry per (row, trigram), sorted by row then trigram, with its count
+    keys, counts = np.unique(np.asarray(rows, dtype=np.int64) * VECTOR_DIM + np.asarray(cols, dtype=np.int64),
+                             return_counts=True)
+    row_of, indices = keys // VECTOR_DIM, keys % VECTOR_DIM
+
+    df = np.bincount(indices, minlength=VECTOR_DIM)
+    idf = np.log((1 + len(texts)) / (1 + df)) + 1
+    data = counts * idf[indices]
+    norms = np.sqrt(np.bincount(row_of, weights=data * data, minlength=len(texts)))
+    data /= norms[row_of]
+    indptr = np.concatenate(([0], np.cumsum(np.bincount(row_of, minlength=len(texts)))))
+    return indptr, indices, data
+
+
+def _only_filler_words_differ(a: str, b: str) -> bool:
+    return set(a.split()) ^ set(b.split()) <= FILLER_WORDS
+
+
+def prefilter_duplicates(incoming_tasks: list[dict], existing_tasks: list[dict], top_k: int = TOP_K):
+    """
+    Resolve the obvious cases locally.
+    Returns (resolved, ambiguous):
+      resolved:  {incoming index: verdict dict} for exact/near-exact duplicates and clearly new lines
+      ambiguous: {incoming index: [existing task dicts, most similar first]} to send to the model
+    """
+    if not existing_tasks:
+        return {i: _verdict(False) for i in range(len(incoming_tasks))}, {}
+
+    # numpy is only needed by imports; keep it out of worker startup
+    import numpy as np
+
+    incoming_norm = [normalize_title(t["title"]) for t in incoming_tasks]
+    existing_norm = [normalize_title(t["title"]) for t in existing_tasks]
+    by_title = {}
+    for t, norm in zip(existing_tasks, existing_norm):
+        by_title.setdefault(norm, t)
+
+    # One vocabulary (and IDF) for both sides. The existing rows are regrouped by
+    # trigram, so each incoming line only touches the titles sharing a trigram
+    # with it and memory stays proportional to the trigrams actually present.
+    indptr, indices, data = trigram_tfidf(existing_norm + incoming_norm)
+    n_existing = len(existing_norm)
+    existing_end = indptr[n_existing]
+    by_trigram = np.argsort(indices[:existing_end], kind="stable")
+    posting_rows = np.repeat(np.arange(n_existing), np.diff(indptr[:n_existing + 1]))[by_trigram]
+    posting_weights = data[:existing_end][by_trigram]
+    posting_ptr = np.concatenate(([0], np.cumsum(np.bincount(indices[:existing_end], minlength=VECTOR_DIM))))
+
+    k = min(top_k, n_existing)
+    resolved, ambiguous = {}, {}
+    for i, norm in enumerate(incoming_norm):
+        exact = by_title.get(norm)
+        if exact:
+            resolved[i] = _verdict(True, exact["id"], "Título idéntico a una tarea existente")
+            continue
+
+        start, end = indptr[n_existing + i], indptr[n_existing + i + 1]
+        spans = [slice(posting_ptr[t], posting_ptr[t + 1]) for t in indices[start:end]]
+        scores = np.bincount(
+            np.concatenate([posting_rows[span] for span in spans]),
+            weights=np.concatenate([posting_weights[span] * w for span, w in zip(spans, data[start:end])]),
+            minlength=n_existing,
+        )
+
+        top = np.argpartition(-scores, k - 1)[:k]
+        order = top[np.argsort(-scores[top])]
+        best = float(scores[order[0]])
+        if best >= NEAR_DUPLICATE_THRESHOLD and _only_filler_words_differ(norm, existing_norm[order[0]]):
+            resolved[i] = _verdict(True, existing_tasks[order[0]]["id"], "Título casi idéntico a una tarea existente")
+        elif best < UNRELATED_THRESHOLD:
+            resolved[i] = _verdict(False, reason="Sin tareas similares existentes")
+        else:
+            ambiguous[i] = [existing_tasks[j] for j in order if scores[j] > 0]
+
+    return resolved, ambiguous
+
+
+def _verdict(is_duplicate, matched_existing_id=None, reason=None):
+    return {"is_duplicate": is_duplicate, "matched_existing_id": matched_existing_id, "match_reason": reason}
@@ -0,0 +1,64 @@
+from sqlalchemy import Integer, SmallInteger, column, func, select, update, values
+from models import Task, lock_task_numbers, reserve_task_numbers
+from services.dedup_cache_service import invalidate_verdicts
+from services.event_service import emit_event
+from services.task_write_service import status_transition_values
+
+# Fields POST /tasks/bulk may set on every targeted task
+BULK_FIELDS = ("status", "assigned_to", "category_id", "priority")
+
+
+def bulk_update_tasks(db, target_ids, changes: dict) -> list[int]:
+    """
+    Apply `changes` to every task whose id is in `target_ids` (a list or a SELECT of
+    Task.id) with a fixed number of statements, following the same transition rules
+    as PUT /tasks/<id>/status:
+      1. one UPDATE ... RETURNING for all rows (completed_at/archived_at/task_number
+         decided per row with CASE on the previous status)
+      2. if tasks leave 'archived', reserve their numbers as one block and assign
+         them with one UPDATE ... FROM (VALUES ...)
+    Does not commit. Returns the ids of the updated tasks.
+    """
+    previous = select(Task.id, Task.status).where(Task.id.in_(target_ids)).subquery("previous")
+
+    new_values = {k: changes[k] for k in BULK_FIELDS if k in changes}
+    new_status = new_values.pop("status", None)
+    if new_status is not None:
+        new_values.update(status_transition_values(new_status, previous.c.status))
+    new_values["last_updated"] = func.now()
+
+    if new_status is not None and new_status != "archived":
+        # Tasks leaving the archive need numbers. Take the allocation lock before
+        # the UPDATE fires the change-stamping trigger (7310003), in the same order
+        # as every other writer, or a concurrent create or import can deadlock with us
+        lock_task_numbers(db)
+
+    rows = db.execute(
+        update(Task)
+        .where(Task.id == previous.c.id)
+        .values(new_values)
+        .returning(Task.id, previous.c.status)
+        .execution_options(synchronize_session=False)
+    ).all()
+    updated_ids = [task_id for task_id, _ in rows]
+
+    if new_status is not None and new_status != "archived":
+        # Re-assign numbers to tasks that came back from the archive
+        unarchived_ids = sorted(task_id for task_id, old_status in rows if old_status == "archived")
+        if unarchived_ids:
+            numbers = reserve_task_numbers(db, len(unarchived_ids))
+            renumber = values(
+                column("id", Integer), column("new_number", SmallInteger), name="renumber"
+            ).data(list(zip(unarchived_ids, numbers)))
+            db.execute(
+                update(Task)
+                .where(Task.id == renumber.c.id)
+                .values(task_number=renumber.c.new_number)
+                .execution_options(synchronize_session=False)
+            )
+
+    if new_status == "archived":
+        invalidate_verdicts(db, updated_ids)
+    if updated_ids:
+        emit_event(db, "task", "bulk_updated", ids=updated_ids, fields=sorted(k for k in BULK_FIELDS if k in changes))
+    return updated_ids
@@ -0,0 +1,87 @@
+from sqlalchemy import func, select
+from sqlalchemy.orm import aliased
+from models import Task, TaskUser, TaskCategory, TaskComment
+
+# Core-row path for task lists: one flat SELECT (creator, assignee and category
+# outer-joined as prefixed columns), rows turned into plain dicts by position.
+# No ORM identity map, no relationship loading, no per-object attribute events.
+
+TASK_FIELDS = (
+    "id", "task_number", "title", "description", "status", "priority", "due_date",
+    "category_id", "created_by", "assigned_to", "completed_at", "archived_at",
+    "created_at", "last_updated",
+)
+USER_FIELDS = ("id", "email", "display_name", "avatar_url", "role")
+CATEGORY_FIELDS = ("id", "name", "color", "icon", "sort_order")
+
+creator = aliased(TaskUser, name="creator")
+assignee = aliased(TaskUser, name="assignee")
+
+_N_TASK = len(TASK_FIELDS)
+_CREATOR = _N_TASK + 1  # after comment_count
+_ASSIGNEE = _CREATOR + len(USER_FIELDS)
+_CATEGORY = _ASSIGNEE + len(USER_FIELDS)
+
+
+def select_tasks(source=None):
+    """
+    SELECT for task rows shaped for serialize_task_row; add filters/order/limit like an ORM query.
+    `source` may be a CTE carrying the task columns (e.g. INSERT/UPDATE ... RETURNING)
+    to read the written row instead of the task table.
+    """
+    if source is None:
+        task, comment_count = Task, Task.comment_count
+    else:
+        task = source.c
+        comment_count = (
+            select(func.count(TaskComment.id)).where(TaskComment.task_id == task.id).scalar_subquery()
+        )
+    return (
+        select(
+            *[getattr(task, f) for f in TASK_FIELDS],
+            comment_count.label("comment_count"),
+            *[getattr(creator, f).label(f"creator__{f}") for f in USER_FIELDS],
+            *[getattr(assignee, f).label(f"assignee__{f}") for f in USER_FIELDS],
+            *[getattr(TaskCategory, f).label(f"category__{f}") for f in CATEGORY_FIELDS],
+        )
+        .select_from(source if source is not None else Task)
+        .outerjoin(creator, task.created_by == creator.id)
+        .outerjoin(assignee, task.assigned_to == assignee.id)
+        .outerjoin(TaskCategory, task.category_id == TaskCategory.id)
+    )
+
+
+def _nested(row, start, fields):
+    if row[start] is None:
+        return None
+    return dict(zip(fields, row[start:start + len(fields)]))
+
+
+def serialize_task_row(row):
+    """Same shape as routes.tasks.serialize_task, built from a select_tasks() row."""
+    data = dict(zip(TASK_FIELDS, row[:_N_TASK]))
+    data["creator"] = _nested(row, _CREATOR, USER_FIELDS)
+    data["assignee"] = _nested(row, _ASSIGNEE, USER_FIELDS)
+    data["category"] = _nested(row, _CATEGORY, CATEGORY_FIELDS)
+    data["comment_count"] = row[_N_TASK] or 0
+    return data
+
+
+def serialize_task_rows_normalized(rows):
+    """
+    Sideloaded shape: tasks carry only created_by/assigned_to/category_id, and each
+    referenced user and category appears once in the `users` / `categories` maps.
+    """
+    tasks, users, categories = [], {}, {}
+    for row in rows:
+        data = dict(zip(TASK_FIELDS, row[:_N_TASK]))
+        data["comment_count"] = row[_N_TASK] or 0
+        tasks.append(data)
+        for start in (_CREATOR, _ASSIGNEE):
+            user_id = row[start]
+            if user_id is not None and user_id not in users:
+                users[user_id] = _nested(row, start, USER_FIELDS)
+        category_id = row[_CATEGORY]
+        if category_id is not None and category_id not in categories:
+            categories[category_id] = _nested(row, _CATEGORY, CATEGORY_FIELDS)
+    return {"tasks": tasks, "users": users, "categories": categories}
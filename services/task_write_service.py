@@ -0,0 +1,53 @@
+from datetime import datetime
+from sqlalchemy import case, select
+from models import Task
+from services.dedup_cache_service import invalidate_verdicts_statement
+from services.event_service import notify_expression
+from services.task_row_service import select_tasks
+
+# Every task column except the generated search vector
+WRITTEN_COLUMNS = [c for c in Task.__table__.c if c.key != "search_vector"]
+
+
+def status_transition_values(new_status, old_status, now=None):
+    """
+    SET values for moving tasks to `new_status`, given an expression for their
+    previous status: completed_at is stamped on entering 'done' and cleared on
+    leaving it; archiving stamps archived_at and releases task_number; leaving the
+    archive clears archived_at (the caller assigns a fresh task_number).
+    """
+    now = now or datetime.utcnow()
+    values = {"status": new_status}
+
+    if new_status == "done":
+        values["completed_at"] = case((old_status != "done", now), else_=Task.completed_at)
+    else:
+        values["completed_at"] = case((old_status == "done", None), else_=Task.completed_at)
+
+    if new_status == "archived":
+        values["archived_at"] = now
+        values["task_number"] = None  # Release number for reuse
+    else:
+        values["archived_at"] = case((old_status == "archived", None), else_=Task.archived_at)
+    return values
+
+
+def write_task(db, stmt, action, invalidate_if=None, **event_extra):
+    """
+    Run an INSERT/UPDATE of one task and read it back in the same statement:
+
+        WITH written AS (<stmt> RETURNING task.*)
+             [, invalidated AS (DELETE FROM dedup_verdict WHERE ...)]
+        SELECT <select_tasks() columns>, pg_notify(...)
+        FROM written LEFT JOIN task_user ... LEFT JOIN task_category ...
+
+    `invalidate_if(written)` is the condition under which dedup verdicts matching the
+    task are dropped. Extra RETURNING columns added to `stmt` are available to it.
+    Returns the written row shaped for serialize_task_row, or None if no row matched.
+    """
+    written = stmt.returning(*WRITTEN_COLUMNS).cte("written")
+    query = select_tasks(written).add_columns(notify_expression("task", action, written.c.id, **event_extra))
+    if invalidate_if is not None:
+        stale = select(written.c.id).where(invalidate_if(written))
+        query = query.add_cte(invalidate_verdicts_statement(stale).cte("invalidated"))
+    return db.execute(query).first()
@@ -0,0 +1,26 @@
+import os
+import pytest
+
+# Keep imports of the app modules offline: no DATABASE_URL from a developer's
+# .env, no background threads. Tests needing Postgres use TEST_DATABASE_URL.
+os.environ["DATABASE_URL"] = os.getenv("TEST_DATABASE_URL", "postgresql://test@localhost/impag_test")
+os.environ.setdefault("ARCHIVE_SCHEDULER", "0")
+os.environ.setdefault("IMPORT_WORKER_THREADS", "0")
+
+
+@pytest.fixture(scope="module")
+def migrated_db():
+    """Drop TEST_DATABASE_URL's public schema and rebuild it from migrations/. Yields the engine."""
+    from sqlalchemy import text
+    from migrate import CREATE_TABLE_SQL, discover, migrate
+    from models import get_engine, invalidate_task_user_cache
+
+    engine = get_engine()
+    with engine.connect() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+        conn.execute(text(CREATE_TABLE_SQL))
+        conn.commit()
+        migrate(conn, discover())
+    invalidate_task_user_cache()
+    yield engine
@@ -0,0 +1,81 @@
+import time
+import pytest
+from auth import TokenVerifier
+from benchmarks.stubs import BENCH_CLIENT_ID, LocalGoogleTokens
+
+EMAIL = "bench0@example.com"
+
+
+class Clock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(scope="module")
+def tokens():
+    return LocalGoogleTokens()
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def verifier(tokens, clock):
+    return TokenVerifier(BENCH_CLIENT_ID, transport=tokens.transport, clock=clock)
+
+
+def test_repeat_token_is_served_from_cache(tokens, verifier):
+    token = tokens.token(EMAIL)
+
+    assert verifier.verify(token)["email"] == EMAIL
+    assert verifier.verify(token)["email"] == EMAIL
+
+    assert verifier.stats() == {"size": 1, "hits": 1, "misses": 1, "cert_fetches": 1}
+
+
+def test_certs_are_reused_until_max_age(tokens, verifier, clock):
+    verifier.verify(tokens.token(EMAIL))
+    clock.now += 3599
+    verifier.verify(tokens.token(EMAIL, lifetime=7200))
+    assert verifier.cert_fetches == 1
+
+    # The stub serves max-age=3600
+    clock.now += 2
+    verifier.verify(tokens.token(EMAIL, lifetime=7201))
+    assert verifier.cert_fetches == 2
+
+
+def test_cached_claims_expire_with_the_token(tokens, verifier, clock):
+    token = tokens.token(EMAIL, lifetime=60)
+    verifier.verify(token)
+    assert verifier.stats()["size"] == 1
+
+    clock.now += 61
+    # jwt.decode runs on real time and still accepts the token; only the cache
+    # entry must have expired, so this is a miss
+    verifier.verify(token)
+    assert verifier.stats()["misses"] == 2
+
+
+def test_expired_token_is_rejected(tokens, verifier):
+    with pytest.raises(ValueError):
+        verifier.verify(tokens.token(EMAIL, lifetime=-60))
+    assert verifier.stats()["size"] == 0
+
+
+def test_token_signed_by_another_key_is_rejected(verifier):
+    forged = LocalGoogleTokens().token(EMAIL)
+    with pytest.raises(ValueError):
+        verifier.verify(forged)
+    assert verifier.stats()["size"] == 0
+
+
+def test_token_for_another_audience_is_rejected(tokens):
+    verifier = TokenVerifier("other-client.apps.googleusercontent.com", transport=tokens.transport)
+    with pytest.raises(ValueError):
+        verifier.verify(tokens.token(EMAIL))
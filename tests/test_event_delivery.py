@@ -0,0 +1,132 @@
+"""
+Change events over a real LISTEN/NOTIFY round trip: each write reaches an open
+/events stream once it commits, and a rolled-back one never does. Needs a
+disposable Postgres database; its public schema is dropped and rebuilt from migrations/:
+
+    TEST_DATABASE_URL=postgresql://localhost/impag_test python -m pytest tests/test_event_delivery.py
+"""
+import json
+import os
+import queue
+import threading
+import time
+import pytest
+from sqlalchemy import text
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("TEST_DATABASE_URL"), reason="needs TEST_DATABASE_URL (a disposable Postgres database)"
+)
+
+EMAIL = "bench0@example.com"
+
+
+@pytest.fixture(scope="module")
+def client(migrated_db):
+    import auth
+    from app import app
+    from benchmarks.stubs import LocalGoogleTokens
+    from models import invalidate_task_user_cache
+
+    with migrated_db.connect() as conn:
+        conn.execute(text(
+            "INSERT INTO task_user (email, display_name) VALUES (:email, 'Bench') ON CONFLICT (email) DO NOTHING"
+        ), {"email": EMAIL})
+        conn.commit()
+    invalidate_task_user_cache()
+
+    tokens = LocalGoogleTokens()
+    saved_verifier, saved_emails = auth.token_verifier, list(auth.allowed_emails)
+    tokens.install([EMAIL])
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {tokens.token(EMAIL)}"
+    yield client
+    auth.token_verifier, auth.allowed_emails[:] = saved_verifier, saved_emails
+
+
+@pytest.fixture(scope="module")
+def events(client, migrated_db):
+    """Frames from an open /events stream, as (event, payload) pairs, once the broker is listening."""
+    from services.event_service import emit_event
+
+    ticket = client.post("/events/ticket").get_json()["data"]["ticket"]
+    stream = client.get(f"/events?ticket={ticket}", buffered=False)
+    assert stream.status_code == 200
+    frames = queue.Queue()
+
+    def read():
+        for chunk in stream.iter_encoded():
+            fields = dict(line.split(": ", 1) for line in chunk.decode().splitlines() if line.startswith(("event:", "data:")))
+            if "event" in fields:
+                frames.put((fields["event"], json.loads(fields["data"])))
+
+    threading.Thread(target=read, daemon=True).start()
+
+    # The listener thread starts with the first subscriber: ping until it hears us
+    deadline = time.monotonic() + 10
+    while True:
+        with migrated_db.begin() as conn:
+            emit_event(conn, "ping", "ping")
+        try:
+            if frames.get(timeout=0.5)[0] == "ping":
+                break
+        except queue.Empty:
+            assert time.monotonic() < deadline, "the event listener never started"
+    # Drop any pings still in flight
+    time.sleep(0.5)
+    while not frames.empty():
+        frames.get_nowait()
+
+    yield frames
+    stream.close()
+
+
+def next_event(frames, timeout=5):
+    return frames.get(timeout=timeout)
+
+
+def assert_quiet(frames, wait=1):
+    with pytest.raises(queue.Empty):
+        frames.get(timeout=wait)
+
+
+def test_task_comment_and_category_writes_are_delivered(client, events):
+    response = client.post("/tasks", json={"title": "Cotizar malla sombra"})
+    assert response.status_code == 201
+    task_id = response.get_json()["data"]["id"]
+    assert next_event(events) == ("task", {"type": "task", "action": "created", "id": task_id})
+
+    response = client.post(f"/tasks/{task_id}/comments", json={"content": "Pedir fotos"})
+    assert response.status_code == 201
+    comment_id = response.get_json()["data"]["id"]
+    assert next_event(events) == (
+        "comment", {"type": "comment", "action": "created", "id": comment_id, "task_id": task_id}
+    )
+
+    response = client.post("/categories", json={"name": "Eventos"})
+    assert response.status_code == 201
+    category_id = response.get_json()["data"]["id"]
+    assert next_event(events) == ("category", {"type": "category", "action": "created", "id": category_id})
+    assert_quiet(events)
+
+
+def test_event_arrives_only_after_commit(migrated_db, events):
+    from services.event_service import emit_event
+
+    with migrated_db.connect() as conn:
+        emit_event(conn, "category", "updated", 1)
+        assert_quiet(events)
+        conn.commit()
+    assert next_event(events) == ("category", {"type": "category", "action": "updated", "id": 1})
+
+
+def test_rolled_back_write_sends_nothing(migrated_db, events):
+    from services.event_service import emit_event
+
+    with migrated_db.connect() as conn:
+        user_id = conn.execute(text("SELECT id FROM task_user WHERE email = :email"), {"email": EMAIL}).scalar_one()
+        category_id = conn.execute(text(
+            "INSERT INTO task_category (name, created_by) VALUES ('Revertida', :user) RETURNING id"
+        ), {"user": user_id}).scalar_one()
+        emit_event(conn, "category", "created", category_id)
+        conn.rollback()
+    assert_quiet(events)
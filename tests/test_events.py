@@ -0,0 +1,49 @@
+import pytest
+import auth
+from app import app
+from services.event_service import broker
+
+USER = {"email": "bench0@example.com", "name": "bench0", "picture": "", "user_id": "1", "task_user_id": 1}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(auth, "allowed_emails", [USER["email"]])
+    # No LISTEN connection: the tests only exercise admission
+    monkeypatch.setattr(broker, "_thread", object())
+    return app.test_client()
+
+
+def test_ticket_round_trip():
+    assert auth.verify_stream_ticket(auth.issue_stream_ticket(USER)) == USER
+
+
+@pytest.mark.parametrize("ticket", [
+    auth.issue_stream_ticket(USER, ttl=-1),
+    auth.issue_stream_ticket(USER)[:-2] + "xx",
+    "not-a-ticket",
+])
+def test_bad_tickets_are_rejected(ticket):
+    with pytest.raises(ValueError):
+        auth.verify_stream_ticket(ticket)
+
+
+def test_stream_needs_a_ticket(client):
+    assert client.get("/events?ticket=bad").status_code == 401
+    assert client.get("/events?access_token=x").status_code == 401
+
+
+def test_streams_beyond_the_cap_get_503(client, monkeypatch):
+    monkeypatch.setattr(broker, "max_subscribers", 1)
+    ticket = auth.issue_stream_ticket(USER)
+
+    first = client.get(f"/events?ticket={ticket}", buffered=False)
+    assert first.status_code == 200
+    second = client.get(f"/events?ticket={ticket}")
+    assert second.status_code == 503
+    assert second.headers["Retry-After"] == "5"
+
+    first.close()
+    third = client.get(f"/events?ticket={ticket}", buffered=False)
+    assert third.status_code == 200
+    third.close()
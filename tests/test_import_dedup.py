@@ -0,0 +1,67 @@
+import anthropic
+import pytest
+import services.import_service as import_service
+from benchmarks.stubs import start_anthropic_stub
+from services.import_service import ANALYSIS_ERROR_REASON, _checked_verdict, detect_duplicates_with_ai
+
+INCOMING = [{"task_number": n, "title": f"Cotización malla sombra cliente {n}"} for n in range(1, 13)]
+EXISTING = [{"id": 100 + n, "task_number": n, "title": f"Cotizar malla sombra {n}"} for n in range(1, 13)]
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    # start_anthropic_stub points the env and the module at itself; undo that afterwards
+    monkeypatch.setenv("ANTHROPIC_BASE_URL", "")
+    monkeypatch.setattr(import_service, "claude_api_key", None)
+    server = start_anthropic_stub()
+    yield anthropic.Anthropic(
+        api_key="test", base_url=f"http://127.0.0.1:{server.server_address[1]}", max_retries=0
+    )
+    server.shutdown()
+
+
+@pytest.fixture(autouse=True)
+def all_ambiguous(monkeypatch):
+    # Every line goes to the model with its own existing task as the only candidate
+    monkeypatch.setattr(import_service, "prefilter_duplicates",
+                        lambda incoming, existing: ({}, {i: [existing[i]] for i in range(len(incoming))}))
+    monkeypatch.setattr(import_service, "dedup_chunk_size", 5)
+    monkeypatch.setattr(import_service, "dedup_concurrency", 2)
+
+
+def test_chunk_verdicts_are_merged_by_index(stub):
+    analyzed = detect_duplicates_with_ai(INCOMING, EXISTING, client=stub)
+
+    # 12 lines in chunks of 5, 5 and 2; the stub flags every fifth index
+    assert [t["title"] for t in analyzed] == [t["title"] for t in INCOMING]
+    assert [i for i, t in enumerate(analyzed) if t["is_duplicate"]] == [0, 5, 10]
+    assert [analyzed[i]["matched_existing_id"] for i in (0, 5, 10)] == [101, 106, 111]
+    assert all(t["matched_existing_id"] is None for t in analyzed if not t["is_duplicate"])
+    assert {t["match_reason"] for t in analyzed} == {"Misma tarea", "Tarea nueva"}
+
+
+def test_unreachable_api_falls_back_to_new(stub):
+    down = anthropic.Anthropic(api_key="test", base_url="http://127.0.0.1:9", max_retries=0)
+
+    analyzed = detect_duplicates_with_ai(INCOMING, EXISTING, client=down)
+
+    assert not any(t["is_duplicate"] for t in analyzed)
+    assert {t["match_reason"] for t in analyzed} == {ANALYSIS_ERROR_REASON}
+
+
+@pytest.mark.parametrize("matched, expected", [
+    (101, 101),
+    (7, 101),       # the candidate's #task_number instead of its ID
+    ("#7", 101),
+    (999, None),    # not a candidate: would break the dedup_verdict foreign key
+    (None, None),
+])
+def test_matched_id_must_be_a_candidate(matched, expected):
+    candidates = [{"id": 101, "task_number": 7, "title": "a"}, {"id": 102, "task_number": None, "title": "b"}]
+
+    verdict = _checked_verdict({"is_duplicate": True, "matched_existing_id": matched, "reason": "r"}, candidates)
+
+    assert verdict["matched_existing_id"] == expected
+    assert verdict["is_duplicate"] is (expected is not None)
+    if expected is None:
+        assert verdict["match_reason"] == ANALYSIS_ERROR_REASON
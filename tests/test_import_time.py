@@ -0,0 +1,12 @@
+import subprocess
+import sys
+from benchmarks.import_time import ROOT
+
+
+def test_app_import_stays_within_budget():
+    # Fresh interpreter: this test process has already imported everything
+    result = subprocess.run(
+        [sys.executable, "-m", "benchmarks.import_time", "--budget-ms", "600"],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    assert result.returncode == 0, result.stdout + result.stderr
@@ -0,0 +1,42 @@
+"""
+No hot task query plans a sequential scan of task or task_comment, on a dataset
+large enough for the planner to choose as it would in production (the same
+check as python -m benchmarks.explain_check). Needs a disposable Postgres
+database; its public schema is dropped and rebuilt from migrations/:
+
+    TEST_DATABASE_URL=postgresql://localhost/impag_test python -m pytest tests/test_query_plans.py
+"""
+import argparse
+import os
+import pytest
+from sqlalchemy import text
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("TEST_DATABASE_URL"), reason="needs TEST_DATABASE_URL (a disposable Postgres database)"
+)
+
+# benchmarks.explain_check refuses to judge plans on fewer tasks than this
+TASKS = 50_000
+
+
+@pytest.fixture(scope="module")
+def db(migrated_db):
+    from benchmarks.dataset import seed
+    from models import SessionLocal
+
+    with migrated_db.begin() as conn:
+        seed(conn, argparse.Namespace(tasks=TASKS, active=3_000, comments=2, users=5, seed=42, reset=True))
+        conn.execute(text("ANALYZE task; ANALYZE task_comment"))
+
+    db = SessionLocal()
+    yield db
+    db.rollback()
+    db.close()
+
+
+def test_hot_queries_use_indexes(db):
+    from benchmarks.explain_check import explain, hot_queries, seq_scans
+
+    scans = {name: seq_scans(explain(db, statement)) for name, statement in hot_queries(db)}
+
+    assert scans == {name: [] for name in scans}
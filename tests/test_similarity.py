@@ -0,0 +1,55 @@
+import pytest
+from services.similarity_service import NEAR_DUPLICATE_THRESHOLD, prefilter_duplicates, trigram_tfidf
+
+EXISTING = [
+    {"id": 1, "title": "Cotizar malla sombra 50% para Juan Herrera"},
+    {"id": 2, "title": "Enviar guía 48213 a Monterrey"},
+    {"id": 3, "title": "Revisar inventario de fertilizantes"},
+    {"id": 4, "title": "Llamar a proveedor de sistemas de riego"},
+    {"id": 5, "title": "Facturar pedido de invernadero"},
+]
+
+
+def verdicts(title):
+    resolved, ambiguous = prefilter_duplicates([{"title": title}], EXISTING)
+    return resolved.get(0), ambiguous.get(0)
+
+
+def test_exact_match_is_resolved_as_duplicate():
+    verdict, _ = verdicts("cotizar  MALLA sombra 50% para Juan Herrera.")
+
+    assert verdict["is_duplicate"] and verdict["matched_existing_id"] == 1
+
+
+def test_filler_word_difference_is_resolved_as_duplicate():
+    verdict, _ = verdicts("Llamar al proveedor de sistemas de riego")
+
+    assert verdict["is_duplicate"] and verdict["matched_existing_id"] == 4
+
+
+@pytest.mark.parametrize("title, closest", [
+    ("Enviar guía 48214 a Monterrey", 2),                   # a different number
+    ("Cotizar malla sombra 50% para Juana Herrera", 1),     # a different client
+])
+def test_near_match_with_different_words_goes_to_the_model(title, closest):
+    verdict, candidates = verdicts(title)
+
+    assert verdict is None
+    assert candidates[0]["id"] == closest
+
+
+def test_name_only_difference_scores_above_the_threshold():
+    # Without the word check this pair would be resolved locally as a duplicate
+    indptr, indices, data = trigram_tfidf([
+        "cotizar malla sombra 50 para juan herrera", "cotizar malla sombra 50 para juana herrera",
+    ])
+    a = dict(zip(indices[indptr[0]:indptr[1]], data[indptr[0]:indptr[1]]))
+    b = dict(zip(indices[indptr[1]:indptr[2]], data[indptr[1]:indptr[2]]))
+
+    assert sum(w * b.get(t, 0) for t, w in a.items()) >= NEAR_DUPLICATE_THRESHOLD
+
+
+def test_unrelated_line_is_resolved_as_new():
+    verdict, _ = verdicts("Pintar la bodega")
+
+    assert verdict == {"is_duplicate": False, "matched_existing_id": None, "match_reason": "Sin tareas similares existentes"}
@@ -0,0 +1,39 @@
+"""
+table_version bumps (the ETag source for conditional GETs). Needs a disposable
+Postgres database; its public schema is dropped and rebuilt from migrations/:
+
+    TEST_DATABASE_URL=postgresql://localhost/impag_test python -m pytest tests/test_table_versions.py
+"""
+import os
+import pytest
+from sqlalchemy import text
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("TEST_DATABASE_URL"), reason="needs TEST_DATABASE_URL (a disposable Postgres database)"
+)
+
+
+def version(conn, table):
+    return conn.execute(text("SELECT version FROM table_version WHERE table_name = :t"), {"t": table}).scalar_one()
+
+
+@pytest.mark.parametrize("statement", [
+    "UPDATE task SET status = 'archived' WHERE false",
+    "DELETE FROM task WHERE false",
+    "INSERT INTO task (title) SELECT 'x' WHERE false",
+])
+def test_statement_without_rows_keeps_the_version(migrated_db, statement):
+    with migrated_db.begin() as conn:
+        before = version(conn, "task")
+        conn.execute(text(statement))
+        assert version(conn, "task") == before
+
+
+def test_statement_with_rows_bumps_the_version(migrated_db):
+    with migrated_db.begin() as conn:
+        before = version(conn, "task_user")
+        conn.execute(text("INSERT INTO task_user (email, display_name) VALUES ('versions@example.com', 'V')"))
+        assert version(conn, "task_user") == before + 1
+        conn.execute(text("UPDATE task_user SET display_name = 'W' WHERE email = 'versions@example.com'"))
+        conn.execute(text("DELETE FROM task_user WHERE email = 'versions@example.com'"))
+        assert version(conn, "task_user") == before + 3
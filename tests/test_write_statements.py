@@ -0,0 +1,95 @@
+"""
+SQL statements per task write, as counted by the app's own instrumentation (the
+"N queries" in Server-Timing). Needs a disposable Postgres database; its public
+schema is dropped and rebuilt from migrations/:
+
+    TEST_DATABASE_URL=postgresql://localhost/impag_test python -m pytest tests/test_write_statements.py
+"""
+import os
+import pytest
+from sqlalchemy import text
+
+pytestmark = pytest.mark.skipif(
+    not os.getenv("TEST_DATABASE_URL"), reason="needs TEST_DATABASE_URL (a disposable Postgres database)"
+)
+
+EMAIL = "bench0@example.com"
+
+
+@pytest.fixture(scope="module")
+def client(migrated_db):
+    import auth
+    from app import app
+    from benchmarks.stubs import LocalGoogleTokens
+    from models import invalidate_task_user_cache
+
+    with migrated_db.connect() as conn:
+        conn.execute(text(
+            "INSERT INTO task_user (email, display_name) VALUES (:email, 'Bench') ON CONFLICT (email) DO NOTHING"
+        ), {"email": EMAIL})
+        conn.commit()
+    invalidate_task_user_cache()
+
+    tokens = LocalGoogleTokens()
+    saved_verifier, saved_emails = auth.token_verifier, list(auth.allowed_emails)
+    tokens.install([EMAIL])
+    client = app.test_client()
+    client.environ_base["HTTP_AUTHORIZATION"] = f"Bearer {tokens.token(EMAIL)}"
+    # Warm the token and task_user caches so only the handlers' own SQL is counted
+    assert client.get("/tasks?limit=1").status_code == 200
+    yield client
+    auth.token_verifier, auth.allowed_emails[:] = saved_verifier, saved_emails
+
+
+def queries(response):
+    timing = response.headers["Server-Timing"]
+    return int(timing.split('desc="')[1].split(" ")[0])
+
+
+def create(client, title="Cotizar malla sombra"):
+    response = client.post("/tasks", json={"title": title})
+    assert response.status_code == 201
+    return response
+
+
+def test_create_task(client):
+    assert queries(create(client)) <= 2
+
+
+def test_update_task(client):
+    task_id = create(client).get_json()["data"]["id"]
+
+    response = client.put(f"/tasks/{task_id}", json={"title": "Cotizar malla sombra 50%"})
+
+    assert response.status_code == 200
+    assert queries(response) <= 1
+
+
+@pytest.mark.parametrize("status, limit", [("in_progress", 2), ("done", 2), ("archived", 1)])
+def test_update_task_status(client, status, limit):
+    task_id = create(client).get_json()["data"]["id"]
+
+    response = client.put(f"/tasks/{task_id}/status", json={"status": status})
+
+    assert response.status_code == 200
+    assert queries(response) <= limit
+
+
+def test_unarchive_renumbers_in_two_statements(client):
+    task_id = create(client).get_json()["data"]["id"]
+    client.put(f"/tasks/{task_id}/status", json={"status": "archived"})
+
+    response = client.put(f"/tasks/{task_id}/status", json={"status": "pending"})
+
+    assert response.status_code == 200
+    assert response.get_json()["data"]["task_number"] is not None
+    assert queries(response) <= 2
+
+
+def test_delete_task(client):
+    task_id = create(client).get_json()["data"]["id"]
+
+    response = client.delete(f"/tasks/{task_id}")
+
+    assert response.status_code == 200
+    assert queries(response) <= 1